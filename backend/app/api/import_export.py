@@ -1,12 +1,118 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
+import asyncio
+import codecs
 import csv
-from io import StringIO
-from ..crud import create_item, create_container, get_all_items
-from ..schemas import Item, Container
+import orjson
+from io import BytesIO, TextIOWrapper
+from typing import Callable, Dict, Iterator, List, Sequence, Set, Tuple
+from pydantic import TypeAdapter, ValidationError
+from ..crud import create_items_bulk, create_containers_bulk, get_all_containers_iter, get_all_items_iter
+from .schemas import Item, Container
 
 router = APIRouter()
 
+# One compiled validator per model, shared by every import request
+_ITEMS_ADAPTER = TypeAdapter(List[Item])
+_CONTAINERS_ADAPTER = TypeAdapter(List[Container])
+
+
+# Uploads larger than this are rejected with 413 before any parsing starts
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+# Rows are validated and inserted this many at a time, so memory stays bounded
+IMPORT_BATCH_SIZE = 10_000
+
+
+def _iter_csv_batches(upload: UploadFile, batch_size: int = IMPORT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """
+    Stream the uploaded CSV in batches of row dicts, dropping empty cells so schema defaults apply.
+    The upload is decoded incrementally line by line instead of being read and decoded whole.
+    """
+    reader = csv.DictReader(codecs.iterdecode(upload.file, 'utf-8'))
+    batch = []
+    for row in reader:
+        batch.append({key: value for key, value in row.items() if value != ""})
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _validate_rows(
+    adapter: TypeAdapter, rows: List[Dict], id_field: str, row_nums: Sequence[int], seen: Set[str]
+) -> Tuple[List[Tuple[int, object]], List[Dict]]:
+    """
+    Validate a batch of rows with one call into pydantic-core instead of one model per row.
+
+    - row_nums: file row (or line) number of each row; seen: IDs accepted by earlier batches (updated in place).
+    - Rows failing validation or repeating an ID already seen in the file are reported as errors.
+    - Returns: (row_num, model) pairs ready for insertion, and the error list.
+    """
+    errors = []
+    bad_rows: Dict[int, str] = {}
+    try:
+        models = adapter.validate_python(rows)
+    except ValidationError as e:
+        # Only the failing rows are re-checked; the common all-valid path is a single call
+        for err in e.errors():
+            index = err["loc"][0]
+            bad_rows.setdefault(index, f"{'.'.join(str(p) for p in err['loc'][1:])}: {err['msg']}")
+        good = [row for index, row in enumerate(rows) if index not in bad_rows]
+        validated = iter(adapter.validate_python(good))
+        models = [None if index in bad_rows else next(validated) for index in range(len(rows))]
+
+    valid = []
+    for index, (model, row_num) in enumerate(zip(models, row_nums)):
+        if index in bad_rows:
+            errors.append({"row": row_num, "message": bad_rows[index]})
+            continue
+        row_id = getattr(model, id_field)
+        if row_id in seen:
+            errors.append({"row": row_num, "message": f"Duplicate {id_field} in file"})
+            continue
+        seen.add(row_id)
+        valid.append((row_num, model))
+    return valid, errors
+
+
+def _import_csv(
+    upload: UploadFile, adapter: TypeAdapter, id_field: str,
+    insert_bulk: Callable[[List], Tuple[int, List[str]]]
+) -> Tuple[int, List[Dict]]:
+    """
+    Validate and bulk-insert an uploaded CSV batch by batch.
+    Blocking: the endpoints run it in the default executor so the event loop keeps serving other requests.
+    Returns: number of rows imported and the accumulated per-row errors.
+    """
+    if upload.size is not None and upload.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"CSV exceeds the {MAX_UPLOAD_BYTES} byte upload limit")
+    imported = 0
+    errors = []
+    seen: Set[str] = set()
+    row_num = 2  # Header is row 1
+    for rows in _iter_csv_batches(upload):
+        row_nums = range(row_num, row_num + len(rows))
+        imported += _insert_batch(adapter, rows, row_nums, id_field, insert_bulk, seen, errors)
+        row_num += len(rows)
+    errors.sort(key=lambda error: error["row"])
+    return imported, errors
+
+
+def _insert_batch(
+    adapter: TypeAdapter, rows: List[Dict], row_nums: Sequence[int], id_field: str,
+    insert_bulk: Callable[[List], Tuple[int, List[str]]], seen: Set[str], errors: List[Dict]
+) -> int:
+    """Validate one batch and insert its valid rows in one transaction; errors are appended to `errors`."""
+    valid, batch_errors = _validate_rows(adapter, rows, id_field, row_nums, seen)
+    inserted, duplicates = insert_bulk([model for _, model in valid])
+    errors.extend(batch_errors)
+    duplicate_ids = set(duplicates)
+    errors.extend({"row": num, "message": f"Duplicate {id_field}"}
+                  for num, model in valid if getattr(model, id_field) in duplicate_ids)
+    return inserted
+
+
 @router.post("/api/import/items")
 async def import_items(file: UploadFile = File(...)) -> Dict:
     """
@@ -17,22 +123,10 @@ async def import_items(file: UploadFile = File(...)) -> Dict:
     """
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
-    content = await file.read()
-    csv_file = StringIO(content.decode('utf-8'))
-    reader = csv.DictReader(csv_file)
-    items_imported = 0
-    errors = []
-
-    for row_num, row in enumerate(reader, start=2):
-        try:
-            item = Item(**row)
-            if create_item(item):
-                items_imported += 1
-            else:
-                errors.append({"row": row_num, "message": "Duplicate itemId"})
-        except Exception as e:
-            errors.append({"row": row_num, "message": str(e)})
-
+    loop = asyncio.get_running_loop()
+    items_imported, errors = await loop.run_in_executor(
+        None, _import_csv, file, _ITEMS_ADAPTER, "itemId", create_items_bulk
+    )
     return {"success": True, "itemsImported": items_imported, "errors": errors}
 
 @router.post("/api/import/containers")
@@ -45,40 +139,146 @@ async def import_containers(file: UploadFile = File(...)) -> Dict:
     """
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
-    content = await file.read()
-    csv_file = StringIO(content.decode('utf-8'))
-    reader = csv.DictReader(csv_file)
-    containers_imported = 0
+    loop = asyncio.get_running_loop()
+    containers_imported, errors = await loop.run_in_executor(
+        None, _import_csv, file, _CONTAINERS_ADAPTER, "containerId", create_containers_bulk
+    )
+    return {"success": True, "containersImported": containers_imported, "errors": errors}
+
+
+# NDJSON import: "type" tag of a line -> (adapter, id field, bulk insert); the format /api/export/data writes
+_NDJSON_TABLES = {
+    "container": (_CONTAINERS_ADAPTER, "containerId", create_containers_bulk),
+    "item": (_ITEMS_ADAPTER, "itemId", create_items_bulk),
+}
+
+
+def _import_ndjson(upload: UploadFile, batch_size: int = IMPORT_BATCH_SIZE) -> Tuple[Dict[str, int], List[Dict]]:
+    """
+    Validate and bulk-insert an uploaded NDJSON file line by line: each line is decoded by orjson
+    and buffered per "type"; a full buffer is validated and inserted as one batch, so memory
+    holds at most one batch per type, never the whole file. Null fields are dropped so schema
+    defaults apply. Containers are flushed before items at the end, as the export writes them.
+    Blocking: the endpoint runs it in the default executor.
+    Returns: rows imported per type and the per-line errors ("row" is the line number).
+    """
+    if upload.size is not None and upload.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"NDJSON exceeds the {MAX_UPLOAD_BYTES} byte upload limit")
+    imported = dict.fromkeys(_NDJSON_TABLES, 0)
     errors = []
+    seen: Dict[str, Set[str]] = {row_type: set() for row_type in _NDJSON_TABLES}
+    pending: Dict[str, Tuple[List[Dict], List[int]]] = {row_type: ([], []) for row_type in _NDJSON_TABLES}
 
-    for row_num, row in enumerate(reader, start=2):
+    def flush(row_type: str) -> None:
+        rows, row_nums = pending[row_type]
+        if rows:
+            adapter, id_field, insert_bulk = _NDJSON_TABLES[row_type]
+            imported[row_type] += _insert_batch(adapter, rows, row_nums, id_field, insert_bulk, seen[row_type], errors)
+            pending[row_type] = ([], [])
+
+    for line_num, line in enumerate(upload.file, start=1):
+        if not line.strip():
+            continue
         try:
-            container = Container(**row)
-            if create_container(container):
-                containers_imported += 1
-            else:
-                errors.append({"row": row_num, "message": "Duplicate containerId"})
-        except Exception as e:
-            errors.append({"row": row_num, "message": str(e)})
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            errors.append({"row": line_num, "message": f"Invalid JSON: {e}"})
+            continue
+        row_type = row.pop("type", None) if isinstance(row, dict) else None
+        if row_type not in _NDJSON_TABLES:
+            errors.append({"row": line_num, "message": "Expected an object with \"type\": \"container\" or \"item\""})
+            continue
+        rows, row_nums = pending[row_type]
+        rows.append({key: value for key, value in row.items() if value is not None})
+        row_nums.append(line_num)
+        if len(rows) == batch_size:
+            flush(row_type)
+    for row_type in _NDJSON_TABLES:
+        flush(row_type)
+    errors.sort(key=lambda error: error["row"])
+    return imported, errors
+
+@router.post("/api/import/data")
+async def import_data(file: UploadFile = File(...)) -> Dict:
+    """
+    Import containers and items from a newline-delimited JSON file.
+
+    - One {"type": "container" | "item", ...} object per line, as written by /api/export/data.
+    - The file is streamed and inserted in batches, so memory use does not grow with its size.
+    - Returns: Success status, counts of imported containers and items, and any errors.
+    """
+    if not file.filename.endswith(('.ndjson', '.jsonl')):
+        raise HTTPException(status_code=400, detail="File must be NDJSON (.ndjson or .jsonl)")
+    loop = asyncio.get_running_loop()
+    imported, errors = await loop.run_in_executor(None, _import_ndjson, file)
+    return {
+        "success": True,
+        "containersImported": imported["container"],
+        "itemsImported": imported["item"],
+        "errors": errors
+    }
 
-    return {"success": True, "containersImported": containers_imported, "errors": errors}
+
+ARRANGEMENT_HEADER = ["Item ID", "Container ID", "Coordinates (W1,D1,H1)", "Coordinates (W2,D2,H2)"]
+
+
+def _arrangement_csv_chunks(batch_size: int = 10_000) -> Iterator[bytes]:
+    """
+    Yield the arrangement CSV as encoded bytes, one DB batch at a time.
+    The writer encodes straight into a single reused byte buffer, so no intermediate str is built per chunk.
+    """
+    buffer = BytesIO()
+    writer = csv.writer(TextIOWrapper(buffer, encoding='utf-8', newline='', write_through=True))
+    writer.writerow(ARRANGEMENT_HEADER)
+    for batch in get_all_items_iter(batch_size=batch_size):
+        writer.writerows(
+            [
+                item["itemId"],
+                item["containerId"],
+                f"({item['startW']},{item['startD']},{item['startH']})",
+                f"({item['endW']},{item['endD']},{item['endH']})"
+            ]
+            for item in batch
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
 
 @router.get("/api/export/arrangement")
 async def export_arrangement():
     """
     Export the current item arrangement as a CSV file.
 
+    - Rows are streamed from the database in batches, so memory use does not grow with the arrangement size.
     - Returns: A downloadable CSV file with item positions.
     """
-    items = get_all_items()
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Item ID", "Container ID", "Coordinates (W1,D1,H1)", "Coordinates (W2,D2,H2)"])
-    for item in items:
-        writer.writerow([
-            item["itemId"],
-            item["containerId"],
-            f"({item['startW']},{item['startD']},{item['startH']})",
-            f"({item['endW']},{item['endD']},{item['endH']})"
-        ])
-    return FileResponse(content=output.getvalue(), filename="arrangement.csv", media_type="text/csv")
\ No newline at end of file
+    return StreamingResponse(
+        _arrangement_csv_chunks(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=arrangement.csv"}
+    )
+
+
+def _export_ndjson_chunks(batch_size: int = 10_000) -> Iterator[bytes]:
+    """
+    Yield every container, then every item, as one JSON object per line (tagged with "type"),
+    encoded by orjson one DB batch at a time; no response model or full list is ever built.
+    """
+    for row_type, batches in (("container", get_all_containers_iter(batch_size)),
+                              ("item", get_all_items_iter(batch_size))):
+        for batch in batches:
+            yield b"".join(
+                orjson.dumps({"type": row_type, **row}, option=orjson.OPT_APPEND_NEWLINE) for row in batch
+            )
+
+@router.get("/api/export/data")
+async def export_data():
+    """
+    Export all containers and items as newline-delimited JSON.
+
+    - Rows are streamed from the database in batches, so memory use does not grow with the database size.
+    - Returns: An application/x-ndjson body, one {"type": "container" | "item", ...} object per line.
+    """
+    return StreamingResponse(_export_ndjson_chunks(), media_type="application/x-ndjson")
@@ -1,4 +1,7 @@
+import asyncio
+from functools import partial
 from fastapi import APIRouter, Query
+from datetime import datetime
 from typing import Optional, List, Dict
 from ..crud import get_logs
 
@@ -6,8 +9,8 @@ router = APIRouter()
 
 @router.get("/api/logs")
 async def get_action_logs(
-    startDate: Optional[str] = Query(None),
-    endDate: Optional[str] = Query(None),
+    startDate: Optional[datetime] = Query(None),
+    endDate: Optional[datetime] = Query(None),
     itemId: Optional[str] = Query(None),
     userId: Optional[str] = Query(None),
     actionType: Optional[str] = Query(None)
@@ -20,7 +23,12 @@ async def get_action_logs(
     - **itemId**: Filter by item ID.
     - **userId**: Filter by user ID.
     - **actionType**: Filter by action type (e.g., "retrieval").
+    - Dates are parsed once here at the route boundary; all filters are applied in SQL by `get_logs`.
     - Returns: A dictionary with a list of logs, e.g., {"logs": [{...}, {...}]}.
     """
-    logs = get_logs(startDate=startDate, endDate=endDate, itemId=itemId, userId=userId, actionType=actionType)
+    # SQLite calls are blocking, so they run in the default executor instead of on the event loop
+    loop = asyncio.get_running_loop()
+    logs = await loop.run_in_executor(None, partial(
+        get_logs, startDate=startDate, endDate=endDate, itemId=itemId, userId=userId, actionType=actionType
+    ))
     return {"logs": logs}
\ No newline at end of file
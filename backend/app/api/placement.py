@@ -1,7 +1,11 @@
+import asyncio
+from collections import Counter
 from fastapi import APIRouter, HTTPException
-from ..schemas import PlacementRequest, PlacementResponse
-from ..utils.placement_algorithm import place_items
-from ..crud import create_item, create_container
+from fastapi.responses import ORJSONResponse
+from .schemas import PlacementRequest, PlacementResponse
+from .utils.placement_algorithm import place_items
+from ..crud import create_containers_bulk, create_placed_items_bulk, get_container_coords, get_existing_item_ids
+from ..item_store import ItemStore
 
 router = APIRouter()
 
@@ -12,24 +16,52 @@ async def placement(request: PlacementRequest):
 
     - Uses a 3D bin-packing algorithm from placement_algorithm.py.
     - Stores item coordinates in the database.
+    - Items whose itemId is repeated in the request or already stored are rejected with 400.
     - Returns: Success status and placement details.
     """
+    item_ids = [item.itemId for item in request.items]
+    repeated = sorted(item_id for item_id, count in Counter(item_ids).items() if count > 1)
+    if repeated:
+        raise HTTPException(status_code=400, detail=f"Duplicate itemId in request: {', '.join(repeated)}")
     try:
-        # Insert containers into the database
-        for container in request.containers:
-            create_container(container)
-        
-        # Place items using the algorithm
-        placements = place_items(request.items, request.containers)
-        
-        # Store placed items in the database with coordinates
-        for placement in placements:
-            item = next(i for i in request.items if i.itemId == placement["itemId"])
-            item.containerId = placement["containerId"]
-            item.startW, item.startD, item.startH = placement["position"]["startCoordinates"]
-            item.endW, item.endD, item.endH = placement["position"]["endCoordinates"]
-            create_item(item)
-        
-        return {"success": True, "placements": placements}
+        # Insert containers into the database and, independently, load what they already hold
+        # and which of the items are already stored, one query each; all three run in the
+        # default executor at the same time
+        loop = asyncio.get_running_loop()
+        _, stored_coords, stored_ids = await asyncio.gather(
+            loop.run_in_executor(None, create_containers_bulk, request.containers),
+            loop.run_in_executor(None, get_container_coords, [c.containerId for c in request.containers]),
+            loop.run_in_executor(None, get_existing_item_ids, item_ids)
+        )
+        # Stored items keep their position; placing them again would report coordinates never saved
+        if stored_ids:
+            raise HTTPException(status_code=400, detail=f"Items already stored: {', '.join(sorted(stored_ids))}")
+
+        # Place items using the algorithm, collecting the coordinates in one packed store
+        store = ItemStore()
+        # (CPU-bound NumPy work on read-only snapshots, so it runs off the event loop)
+        placements = await loop.run_in_executor(
+            None, place_items, request.items, request.containers, store, stored_coords
+        )
+
+        # Store placed items in the database with coordinates (one executemany transaction,
+        # so it also runs in the default executor)
+        _, duplicates = await loop.run_in_executor(
+            None, create_placed_items_bulk, {i.itemId: i for i in request.items}, store
+        )
+        if duplicates:
+            # Stored by a concurrent request after the check above: their rows (and positions) are
+            # the other request's, so they are reported instead of listed with unsaved coordinates
+            duplicate_ids = set(duplicates)
+            placements = [p for p in placements if p["itemId"] not in duplicate_ids]
+
+        # The placements are plain dicts (position -> start/endCoordinates) built by place_items from
+        # floats it computed itself; returning the response directly skips re-validating every
+        # nested coordinate against PlacementResponse and encodes it with orjson in one call
+        return ORJSONResponse({
+            "success": True,
+            "placements": placements,
+            "errors": [{"itemId": item_id, "message": "Duplicate itemId"} for item_id in duplicates]
+        })
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
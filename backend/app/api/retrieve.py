@@ -1,20 +1,21 @@
-from fastapi import APIRouter, HTTPException
-from ..schemas import RetrieveRequest, Log
-from ..crud import get_item_by_id, update_item, create_log
-import json
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from .schemas import RetrieveRequest, Log
+from ..crud import get_item_by_id, update_item, queue_log, flush_logs, prefetch_container_items
 
 router = APIRouter()  # Fixed typo from L=APIRouter()
 
 @router.post("/api/retrieve")
-async def retrieve_item(request: RetrieveRequest):
+async def retrieve_item(request: RetrieveRequest, background_tasks: BackgroundTasks):
     """
     Retrieve an item, update its usage limit, and log the action.
 
     - **request**: A JSON body containing itemId, userId, and timestamp.
     - Returns: A JSON response indicating success or failure.
     """
-    # Fetch the item from the database
-    item = get_item_by_id(request.itemId)
+    # Fetch the item from the database (SQLite calls run in the default executor, off the event loop)
+    loop = asyncio.get_running_loop()
+    item = await loop.run_in_executor(None, get_item_by_id, request.itemId)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
@@ -22,9 +23,8 @@ async def retrieve_item(request: RetrieveRequest):
     if item["usageLimit"] <= 0:
         raise HTTPException(status_code=400, detail="Item has no remaining uses")
 
-    # Update the usage limit
+    # New usage limit (written below, alongside the log entry)
     new_usage_limit = item["usageLimit"] - 1
-    update_item(request.itemId, {"usageLimit": new_usage_limit})
 
     # Log the retrieval action
     log_details = {
@@ -38,8 +38,18 @@ async def retrieve_item(request: RetrieveRequest):
         userId=request.userId,
         actionType="retrieval",
         itemId=request.itemId,
-        details=json.dumps(log_details)
+        details=log_details
     )
-    create_log(log_entry)
+
+    # Queuing the log entry is a list append (batches are written by flush_logs), so it stays on the
+    # event loop; a full buffer is flushed in the default executor, concurrently with the usage update
+    writes = [loop.run_in_executor(None, update_item, request.itemId, {"usageLimit": new_usage_limit})]
+    if queue_log(log_entry):
+        writes.append(loop.run_in_executor(None, flush_logs))
+    await asyncio.gather(*writes)
+
+    # The next retrieval is likely from the same container: warm its items after responding
+    if item["containerId"]:
+        background_tasks.add_task(prefetch_container_items, item["containerId"])
 
     return {"success": True}
\ No newline at end of file
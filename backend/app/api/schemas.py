@@ -1,45 +1,67 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+from datetime import datetime
+from typing import Annotated, Any, Dict, Optional, List
+
+# The single set of transport models used by every API router.
+# Request/transport models are immutable and tolerate unknown keys from clients
+transport_config = ConfigDict(frozen=True, extra='ignore', str_strip_whitespace=True)
+
+NonNegativeFloat = Annotated[float, Field(ge=0)]
 
 class RetrieveRequest(BaseModel):
+    model_config = transport_config
+
     itemId: str
     userId: str
-    timestamp: str  # Expected in ISO format, e.g., "2023-10-25T12:00:00Z"
+    timestamp: datetime  # ISO format, e.g., "2023-10-25T12:00:00Z"; parsed once here
 
 class Log(BaseModel):
-    timestamp: str
+    model_config = transport_config
+
+    timestamp: datetime
     userId: str
     actionType: str
-    itemId: str
-    details: str
+    details: Dict[str, Any]  # Serialized to JSON text by crud.create_log
+    itemId: Optional[str] = None  # None for actions not about one item (e.g. waste planning)
 
 class Item(BaseModel):
+    model_config = transport_config
+
     itemId: str
     name: str
     width: float
     depth: float
     height: float
-    weight: float
+    # Stored in the items.mass column; clients may still send it as "weight"
+    mass: Optional[float] = Field(None, validation_alias=AliasChoices('mass', 'weight'))
     usageLimit: int
+    priority: Optional[int] = None
+    preferredZone: Optional[str] = None
     expiryDate: Optional[str] = None
     containerId: Optional[str] = None
-    startW: Optional[float] = 0
-    startD: Optional[float] = 0
-    startH: Optional[float] = 0
-    endW: Optional[float] = 0
-    endD: Optional[float] = 0
-    endH: Optional[float] = 0
+    startW: NonNegativeFloat = 0.0
+    startD: NonNegativeFloat = 0.0
+    startH: NonNegativeFloat = 0.0
+    endW: NonNegativeFloat = 0.0
+    endD: NonNegativeFloat = 0.0
+    endH: NonNegativeFloat = 0.0
 
 class Container(BaseModel):
+    model_config = transport_config
+
     containerId: str
+    zone: Optional[str] = None
     width: float
     depth: float
     height: float
 
 class PlacementRequest(BaseModel):
+    model_config = transport_config
+
     items: List[Item]
     containers: List[Container]
 
 class PlacementResponse(BaseModel):
     success: bool
-    placements: List[dict]
\ No newline at end of file
+    placements: List[dict]
+    errors: List[dict] = []  # {"itemId", "message"} for items not stored (e.g. duplicate itemId)
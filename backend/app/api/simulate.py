@@ -1,7 +1,8 @@
+import asyncio
 from fastapi import APIRouter
 from datetime import datetime, timedelta
 from typing import List, Dict
-from ..crud import get_all_items, update_item
+from ..crud import get_items_expiring, simulate_day
 
 router = APIRouter()
 
@@ -13,18 +14,22 @@ async def simulate_time(numOfDays: int) -> Dict:
     - **numOfDays**: Number of days to simulate.
     - Returns: Success status, new date, and changes made.
     """
-    items = get_all_items()
     current_date = datetime.now()
     new_date = current_date + timedelta(days=numOfDays)
-    changes = {"itemsUsed": [], "itemsDepletedToday": []}
 
-    for item in items:
-        if item["usageLimit"] > 0:  # Simulate usage (simplified)
-            new_usage = max(0, item["usageLimit"] - 1)
-            update_item(item["itemId"], {"usageLimit": new_usage})
-            changes["itemsUsed"].append({"itemId": item["itemId"], "name": item["name"]})
-            if new_usage == 0:
-                changes["itemsDepletedToday"].append({"itemId": item["itemId"], "name": item["name"]})
+    # Simulate usage (simplified): one set-based UPDATE returns every item it touched, while
+    # the items expiring on the way to new_date are read as one integer range on expiry_epoch
+    # (blocking SQLite work, so both run in the default executor instead of on the event loop)
+    loop = asyncio.get_running_loop()
+    used, expired = await asyncio.gather(
+        loop.run_in_executor(None, simulate_day),
+        loop.run_in_executor(None, get_items_expiring, current_date.date(), new_date.date())
+    )
+    changes = {
+        "itemsUsed": [{"itemId": item_id, "name": name} for item_id, name, _ in used],
+        "itemsExpired": [{"itemId": item_id, "name": name} for item_id, name in expired],
+        "itemsDepletedToday": [{"itemId": item_id, "name": name} for item_id, name, usage in used if usage == 0]
+    }
 
     return {
         "success": True,
@@ -0,0 +1,207 @@
+# backend/app/api/utils/_placement_kernels.py
+"""
+Vectorized kernels for the placement and retrieval searches.
+
+Each kernel works on plain, contiguous NumPy arrays (no item objects), so the hot loops of
+find_best_placement_for_item and the retrieval blocker lookup run inside NumPy instead of
+the interpreter.
+"""
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from ...item_store import COORD_DTYPE
+
+# Score weights shared with score_placement (lower score is better)
+DISTANCE_WEIGHT = 0.1
+ACCESSIBILITY_WEIGHT = 0.5
+ZONE_PENALTY = 100.0
+
+# Candidate points are checked against the placed items in blocks of this many rows,
+# which bounds the (points x items) collision matrix to a few MB
+POINT_BLOCK_SIZE = 4096
+# First collision block in score order; blocks double up to POINT_BLOCK_SIZE
+FIRST_BLOCK_SIZE = 64
+
+
+def overlap_matrix(starts_a: np.ndarray, ends_a: np.ndarray, starts_b: np.ndarray, ends_b: np.ndarray) -> np.ndarray:
+    """
+    (A, B) boolean matrix: entry [i, j] is True when open box i of A overlaps box j of B.
+    One broadcast over all pairs; boxes that only touch on a face do not overlap.
+
+    Both halves of the AABB test are packed into six lanes: start_a < end_b and
+    end_a > start_b  <=>  (start_a, -end_a) < (end_b, -start_b), so the whole test is a
+    single less-than and one all() with no separate AND pass. Negation is exact in float.
+    """
+    lhs = np.concatenate((starts_a, -ends_a), axis=1)
+    rhs = np.concatenate((ends_b, -starts_b), axis=1)
+    return (lhs[:, None, :] < rhs[None, :, :]).all(axis=2)
+
+
+def project_points(points: np.ndarray, starts: np.ndarray, ends: np.ndarray, axis: int) -> np.ndarray:
+    """
+    Slides every point toward 0 along `axis` until it meets an item face or the container wall.
+
+    An item stops point p when p lies inside the item's extent on the two other axes and the
+    item's far face along `axis` is at or before p. Returns a new (P, 3) array.
+    """
+    projected = points.copy()
+    if len(starts) == 0:
+        projected[:, axis] = 0.0
+        return projected
+    others = [a for a in range(3) if a != axis]
+    for block in range(0, len(points), POINT_BLOCK_SIZE):
+        p = points[block:block + POINT_BLOCK_SIZE]
+        supports = ((starts[None, :, others] <= p[:, None, others]) &
+                    (p[:, None, others] < ends[None, :, others])).all(axis=2)
+        supports &= ends[None, :, axis] <= p[:, None, axis]
+        # Highest supporting face, or the wall at 0 when nothing is in the way
+        faces = np.where(supports, ends[None, :, axis], 0.0)
+        projected[block:block + POINT_BLOCK_SIZE, axis] = faces.max(axis=1)
+    return projected
+
+
+def search_rotations(
+    points: np.ndarray,
+    rotation_dims: Sequence[Tuple[float, float, float]],
+    container_dims: Tuple[float, float, float],
+    starts: np.ndarray,
+    ends: np.ndarray,
+    zone_penalty: float,
+    min_score: float = float('inf')
+) -> Tuple[float, int, int]:
+    """
+    Finds the lowest-scoring valid (rotation, position) pair for one item in one container.
+
+    Every rotation is scored against every point in a single NumPy expression, and the
+    collision test then walks all pairs in score order at once, instead of one search per rotation.
+
+    - points: (P, 3) candidate (x, y, z) positions, shared by all rotations.
+    - rotation_dims: (w, h, d) of the item in each allowed rotation.
+    - container_dims: (w, h, d) of the container.
+    - starts, ends: (N, 3) corners of the items already in the container.
+    - zone_penalty: added to every score (0 in the preferred zone), so scoring has no branch.
+    - min_score: best score found so far; only strictly better pairs are considered.
+    - Returns: (best score, index into rotation_dims, index into points), or (inf, -1, -1).
+      Equal scores resolve to the earlier rotation, then the earlier point.
+    """
+    dims_arr = np.asarray(rotation_dims, dtype=COORD_DTYPE).reshape(-1, 3)
+    n_points = len(points)
+    # Rotation-major (R * P, 3) layout: pair k is rotation k // P at point k % P
+    near = (points[None, :, :]).repeat(len(dims_arr), axis=0).reshape(-1, 3)
+    far = (points[None, :, :] + dims_arr[:, None, :]).reshape(-1, 3)
+    depth = np.repeat(dims_arr[:, 2], n_points)
+
+    # 1. Bounds check for all pairs at once
+    candidates = np.flatnonzero((near >= 0).all(axis=1) & (far <= np.asarray(container_dims)).all(axis=1))
+
+    # 2. Score first: it is cheap, and pairs that cannot beat min_score skip the collision test
+    x, y, z = near[candidates, 0], near[candidates, 1], near[candidates, 2]
+    # Same summation order as score_placement, so scores agree bit for bit
+    scores = (DISTANCE_WEIGHT * np.sqrt(x * x + y * y + z * z) +
+              zone_penalty +
+              ACCESSIBILITY_WEIGHT * (z + depth[candidates]))
+    better = scores < min_score
+    candidates, scores = candidates[better], scores[better]
+    if candidates.size == 0:
+        return float('inf'), -1, -1
+
+    # Stable order keeps the first pair in scan order among equal scores
+    order = np.argsort(scores, kind='stable')
+    candidates, scores = candidates[order], scores[order]
+    if len(starts) == 0:
+        best = int(candidates[0])
+        return float(scores[0]), best // n_points, best % n_points
+
+    # 3. Collision check in score order: the first free candidate is the answer.
+    # Blocks start small and double, so the usual case (a free point among the best few)
+    # never tests the long tail, while hard cases still reach full-size blocks quickly.
+    block, size = 0, FIRST_BLOCK_SIZE
+    while block < candidates.size:
+        idx = candidates[block:block + size]
+        near_idx = near_items(starts, ends, near[idx].min(axis=0), far[idx].max(axis=0), container_dims)
+        if near_idx.size == 0:
+            free_at = block
+        else:
+            # Narrow phase: exact (pairs x near items) overlap matrix
+            overlap = overlap_matrix(near[idx], far[idx], starts[near_idx], ends[near_idx])
+            free = np.flatnonzero(~overlap.any(axis=1))
+            free_at = block + int(free[0]) if free.size else -1
+        if free_at >= 0:
+            best = int(candidates[free_at])
+            return float(scores[free_at]), best // n_points, best % n_points
+        block += size
+        size = min(2 * size, POINT_BLOCK_SIZE)
+    return float('inf'), -1, -1
+
+
+def near_items(
+    starts: np.ndarray, ends: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+    container_dims: Tuple[float, float, float]
+) -> np.ndarray:
+    """
+    Broad phase: indices of the items overlapping the box [lo, hi), i.e. the only items that can
+    collide with a candidate block whose points and far corners span that box.
+
+    Axes are tested one at a time, most constrained first (smallest extent relative to the
+    container), and the surviving indices are compacted after each axis, so the later axes
+    only compare the few items left instead of every item.
+    """
+    extent = (hi - lo) / np.maximum(np.asarray(container_dims, dtype=COORD_DTYPE), 1e-12)
+    near = np.arange(len(starts))
+    for axis in np.argsort(extent, kind='stable'):
+        keep = (starts[near, axis] < hi[axis]) & (ends[near, axis] > lo[axis])
+        near = near[keep]
+        if near.size == 0:
+            break
+    return near
+
+
+def blockers_mask(
+    boxes: np.ndarray,
+    min_x: float, max_x: float, min_y: float, max_y: float
+) -> np.ndarray:
+    """
+    Boolean mask over `boxes` ((N, 6) rows of x0, y0, z0, x1, y1, z1) of the boxes whose
+    X-Y footprint overlaps [min_x, max_x) x [min_y, max_y). Callers pass only the boxes
+    already known to lie in front of the target along Z.
+    """
+    return ((np.maximum(min_x, boxes[:, 0]) < np.minimum(max_x, boxes[:, 3])) &
+            (np.maximum(min_y, boxes[:, 1]) < np.minimum(max_y, boxes[:, 4])))
+
+
+def blocking_pairs(boxes: np.ndarray, block_size: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    All (i, j) index pairs over `boxes` ((N, 6) rows of x0, y0, z0, x1, y1, z1, sorted by z0)
+    where box j lies in front of box i along Z (z0_j >= z1_i) and overlaps its X-Y footprint,
+    i.e. j blocks i's retrieval path. Pairs come out ordered by i, then j.
+
+    Rows are tested `block_size` at a time against one broadcast slab; because the boxes are
+    sorted by z0, each slab only spans the columns at or beyond the block's smallest z1.
+
+    The footprint test max(a0, b0) < min(a1, b1) is split into a0 < b1 and b0 < a1 plus the
+    per-box a0 < a1 and b0 < b1, which are evaluated once per box. The slab then holds only
+    one-byte comparison results, never float64 max/min temporaries, for the same exact answer.
+    """
+    x0, y0, z0, x1, y1 = (boxes[:, k] for k in range(5))
+    has_area = (x0 < x1) & (y0 < y1) # Boxes with an empty footprint never overlap anything
+    blocked_rows, blocker_cols = [], []
+    for start in range(0, len(boxes), block_size):
+        rows = boxes[start:start + block_size]
+        first = int(np.searchsorted(z0, rows[:, 5].min(), side='left'))
+        mask = (z0[first:] >= rows[:, 5, None])
+        mask &= rows[:, 0, None] < x1[first:]
+        mask &= x0[first:] < rows[:, 3, None]
+        mask &= rows[:, 1, None] < y1[first:]
+        mask &= y0[first:] < rows[:, 4, None]
+        mask &= has_area[first:]
+        mask &= has_area[start:start + block_size, None]
+        r, c = np.nonzero(mask)
+        r += start
+        c += first
+        keep = r != c # An item never blocks itself
+        blocked_rows.append(r[keep])
+        blocker_cols.append(c[keep])
+    if not blocked_rows:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(blocked_rows), np.concatenate(blocker_cols)
@@ -1,8 +1,17 @@
 # backend/app/api/utils/placement_algorithm.py
 import logging
-from typing import List, Optional, Dict, Tuple
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import Deque, List, Optional, Dict, Tuple, NamedTuple
 from decimal import Decimal # Use Decimal for precision if needed, otherwise float is fine
 
+import numpy as np
+
+from ...item_store import COORD_DTYPE, ItemStore
+from ._placement_kernels import (
+    ACCESSIBILITY_WEIGHT, DISTANCE_WEIGHT, ZONE_PENALTY, overlap_matrix, project_points, search_rotations
+)
+
 # Assuming schemas are defined elsewhere (e.g., app.schemas)
 # from app.schemas import ItemCreate, PlacedItem, Container, ItemDefinition
 
@@ -17,30 +26,56 @@ def get_item_dimensions(item: 'ItemCreate', rotation: int = 0) -> Tuple[float, f
     # definition = get_item_definition(item.itemDefinitionId) # Fetch from DB or cache
     # w, h, d = definition.width, definition.height, definition.depth
     # Placeholder dimensions:
-    w, h, d = float(item.width), float(item.height), float(item.depth)
+    return _rotate(float(item.width), float(item.height), float(item.depth), rotation)
+
+# Axis permutation applied to (w, h, d) by each rotation index: 0=XYZ (original), 1=YXZ, 2=XZY
+ROTATION_AXES = ((0, 1, 2), (1, 0, 2), (0, 2, 1))
+
+def _rotate(w: float, h: float, d: float, rotation: int) -> Tuple[float, float, float]:
+    # Table lookup instead of a branch per rotation; unknown rotations keep the original orientation
+    dims = (w, h, d)
+    a, b, c = ROTATION_AXES[rotation] if 0 <= rotation < len(ROTATION_AXES) else ROTATION_AXES[0]
+    return dims[a], dims[b], dims[c]
 
-    # Simple rotation logic (adjust based on actual rotation rules)
-    if rotation == 0: # XYZ (Original)
-        return w, h, d
-    elif rotation == 1: # YXZ
-        return h, w, d
-    elif rotation == 2: # XZY
-        return w, d, h
-    # Add other rotation cases as needed
-    else: # Default to original if rotation is unknown
-        return w, h, d
-
-def get_item_rotations(item: 'ItemCreate') -> List[int]:
-    """Returns a list of valid rotation indices (e.g., 0, 1, 2)."""
+ROTATIONS = (0, 1, 2) # Example: Allow 3 basic rotations
+VOLUME_TOLERANCE = 1e-9 # Relative slack on the free-volume check, for float rounding in summed volumes
+
+@lru_cache(maxsize=4096)
+def _distinct_rotations(w: float, h: float, d: float) -> Tuple[int, ...]:
+    """Keeps the first rotation index for each distinct (w, h, d) it produces."""
+    by_dims: Dict[Tuple[float, float, float], int] = {}
+    for rotation in ROTATIONS:
+        by_dims.setdefault(_rotate(w, h, d, rotation), rotation)
+    return tuple(by_dims.values())
+
+def get_item_rotations(item: 'ItemCreate') -> Tuple[int, ...]:
+    """
+    Returns the valid rotation indices (e.g., 0, 1, 2), skipping rotations that repeat
+    dimensions already covered (a cube needs 1, a square cross-section 2), cached per shape.
+    """
     # Return allowed rotations, maybe based on item properties
-    return [0, 1, 2] # Example: Allow 3 basic rotations
+    return _distinct_rotations(round(float(item.width), 6), round(float(item.height), 6), round(float(item.depth), 6))
+
+@lru_cache(maxsize=4096)
+def _rotation_table(
+    w: float, h: float, d: float, rotations: Tuple[int, ...]
+) -> Tuple[Tuple[int, Tuple[float, float, float]], ...]:
+    return tuple((rotation, _rotate(w, h, d, rotation)) for rotation in rotations)
+
+def get_rotated_dimensions(item: 'ItemCreate') -> Tuple[Tuple[int, Tuple[float, float, float]], ...]:
+    """(rotation, (w, h, d)) for each of the item's distinct rotations, evaluated once per item shape."""
+    w, h, d = float(item.width), float(item.height), float(item.depth)
+    return _rotation_table(w, h, d, get_item_rotations(item))
 
 def check_collision(
     pos_x: float, pos_y: float, pos_z: float,
     dim_w: float, dim_h: float, dim_d: float,
     other_item: 'PlacedItem'
 ) -> bool:
-    """Checks if the new item collides with an existing item."""
+    """
+    Checks if the new item collides with an existing item.
+    Scalar reference for one pair; the placement search uses the batched overlap_matrix kernel instead.
+    """
     # Basic Axis-Aligned Bounding Box (AABB) collision detection
     # Assumes other_item has position (px, py, pz) and dimensions (pw, ph, pd)
     other_x, other_y, other_z = float(other_item.pos_x), float(other_item.pos_y), float(other_item.pos_z)
@@ -52,9 +87,130 @@ def check_collision(
 
     return collides_x and collides_y and collides_z
 
+class ItemArrays(NamedTuple):
+    """Array view of a container's placed items: row i holds item i's (x, y, z) corners."""
+    starts: np.ndarray # (N, 3) minimum corners
+    ends: np.ndarray   # (N, 3) maximum corners
+
+def build_item_arrays(existing_items: List['PlacedItem']) -> ItemArrays:
+    """
+    Converts placed items to SoA arrays so collision checks run as NumPy ufuncs.
+    COORD_DTYPE (float64) is kept so faces that touch exactly (e.g. a point at x + w) never read as overlapping.
+    """
+    boxes = np.array(
+        [(item.pos_x, item.pos_y, item.pos_z, item.width, item.height, item.depth) for item in existing_items],
+        dtype=COORD_DTYPE
+    ).reshape(-1, 6)
+    starts = boxes[:, :3]
+    return ItemArrays(starts, starts + boxes[:, 3:])
+
+# Column order that turns (startW, startD, startH, endW, endD, endH) into (x0, y0, z0, x1, y1, z1)
+STORED_TO_AXES = [0, 2, 1, 3, 5, 4]
+
+class ContainerState:
+    """
+    Growable per-container copy of the placed items' corners, kept across a placement batch.
+
+    Row i of the backing (capacity, 6) buffer holds (x0, y0, z0, x1, y1, z1) of item i;
+    capacity doubles when full, so appending is amortized O(1) and never rebuilds from objects.
+
+    used_volume tracks the placed volume so containers too full for an item are skipped outright.
+    The extreme-point candidates are maintained alongside: once built, each append only adds
+    the new box's corners and lets the new box raise the projections of the existing corners
+    it supports, which is O(N) instead of redoing every O(N^2) projection per item.
+    """
+
+    # One state per container per batch; slots keep attribute access cheap in the placement loop
+    __slots__ = ('n', 'used_volume', '_boxes', '_candidates', '_m')
+
+    def __init__(self, existing_items: Optional[List['PlacedItem']] = None, capacity: int = 16):
+        initial = build_item_arrays(existing_items or [])
+        self.n = len(initial.starts)
+        # Total volume of the placed items: the container's free volume bounds what can still fit
+        self.used_volume = float(np.prod(initial.ends - initial.starts, axis=1).sum())
+        self._boxes = np.empty((max(capacity, 2 * self.n), 6), dtype=COORD_DTYPE)
+        self._boxes[:self.n, :3] = initial.starts
+        self._boxes[:self.n, 3:] = initial.ends
+        # (3, capacity, 3): raw corners, corners projected down (y), corners projected to the front (z)
+        self._candidates: Optional[np.ndarray] = None
+        self._m = 0
+
+    @classmethod
+    def from_stored_coords(cls, coords: np.ndarray, capacity: int = 16) -> 'ContainerState':
+        """
+        Builds the state from an (N, 6) array of stored coordinates in items-table order
+        (startW, startD, startH, endW, endD, endH), e.g. from crud.get_container_coords.
+        """
+        n = len(coords)
+        state = cls(capacity=max(capacity, 2 * n))
+        # Algorithm axes: x = width, y = height, z = depth
+        state._boxes[:n] = coords[:, STORED_TO_AXES]
+        state.n = n
+        state.used_volume = float(np.prod(state._boxes[:n, 3:] - state._boxes[:n, :3], axis=1).sum())
+        return state
+
+    def append(self, pos: Tuple[float, float, float], dims: Tuple[float, float, float]) -> None:
+        if self.n == len(self._boxes):
+            grown = np.empty((2 * len(self._boxes), 6), dtype=COORD_DTYPE)
+            grown[:self.n] = self._boxes[:self.n]
+            self._boxes = grown
+        row = self._boxes[self.n]
+        row[:3] = pos
+        row[3:] = row[:3] + dims
+        self.n += 1
+        self.used_volume += float(np.prod(dims))
+        if self._candidates is not None:
+            self._add_candidates(row[:3], row[3:])
+
+    def _add_candidates(self, start: np.ndarray, end: np.ndarray) -> None:
+        m = self._m
+        raw = self._candidates[0, :m]
+        for layer, axis in ((1, 1), (2, 2)):
+            others = [a for a in range(3) if a != axis]
+            # Existing corners the new box now supports slide only as far as its face
+            supports = (((start[others] <= raw[:, others]) & (raw[:, others] < end[others])).all(axis=1) &
+                        (end[axis] <= raw[:, axis]))
+            column = self._candidates[layer, :m, axis]
+            np.maximum(column, end[axis], out=column, where=supports)
+        if m + 3 > self._candidates.shape[1]:
+            grown = np.empty((3, 2 * self._candidates.shape[1], 3), dtype=COORD_DTYPE)
+            grown[:, :m] = self._candidates[:, :m]
+            self._candidates = grown
+        corners = _corner_points(start[None, :], end[None, :], origin=False)
+        starts, ends = self.arrays
+        self._candidates[0, m:m + 3] = corners
+        self._candidates[1, m:m + 3] = project_points(corners, starts, ends, axis=1)
+        self._candidates[2, m:m + 3] = project_points(corners, starts, ends, axis=2)
+        self._m = m + 3
+
+    @property
+    def arrays(self) -> ItemArrays:
+        """Views (no copy) of the first n rows."""
+        return ItemArrays(self._boxes[:self.n, :3], self._boxes[:self.n, 3:])
+
+    @property
+    def candidates(self) -> np.ndarray:
+        """Extreme-point candidates of the current contents (same set as extreme_points(self.arrays))."""
+        if self._candidates is None:
+            points = extreme_points(self.arrays).reshape(3, -1, 3)
+            self._m = points.shape[1]
+            self._candidates = np.empty((3, max(2 * self._m, 16), 3), dtype=COORD_DTYPE)
+            self._candidates[:, :self._m] = points
+        return self._candidates[:, :self._m].reshape(-1, 3)
+
+def collides_with_any(
+    item_arrays: ItemArrays,
+    pos_x: float, pos_y: float, pos_z: float,
+    dim_w: float, dim_h: float, dim_d: float
+) -> bool:
+    """Vectorized AABB test of one candidate box against every placed item at once."""
+    start = np.array(((pos_x, pos_y, pos_z),), dtype=COORD_DTYPE)
+    end = start + (dim_w, dim_h, dim_d)
+    return bool(overlap_matrix(start, end, item_arrays.starts, item_arrays.ends).any())
+
 def is_placement_valid(
     container: 'Container',
-    existing_items: List['PlacedItem'],
+    item_arrays: ItemArrays,
     pos_x: float, pos_y: float, pos_z: float,
     dim_w: float, dim_h: float, dim_d: float
 ) -> bool:
@@ -68,15 +224,10 @@ def is_placement_valid(
         # logger.debug(f"Placement invalid: Out of bounds ({pos_x},{pos_y},{pos_z}) D({dim_w},{dim_h},{dim_d}) in C({cont_w},{cont_h},{cont_d})")
         return False
 
-    # 2. Check collisions with existing items
-    # *** EFFICIENCY BOTTLENECK ***
-    # Iterating through all items is O(N).
-    # Replace this loop with a spatial index query (e.g., Octree) for O(log N) or better.
-    # spatial_index.query_region(bounding_box_of_new_item) -> potential colliders
-    for other_item in existing_items:
-        if check_collision(pos_x, pos_y, pos_z, dim_w, dim_h, dim_d, other_item):
-            # logger.debug(f"Placement invalid: Collision with item {other_item.item_id} at ({pos_x},{pos_y},{pos_z})")
-            return False
+    # 2. Check collisions with existing items (one vectorized pass instead of a Python loop)
+    if collides_with_any(item_arrays, pos_x, pos_y, pos_z, dim_w, dim_h, dim_d):
+        # logger.debug(f"Placement invalid: Collision at ({pos_x},{pos_y},{pos_z})")
+        return False
 
     # 3. Check stability (optional, basic check: is it resting on the floor or another item?)
     # Requires more complex geometry checks - omitted for simplicity here.
@@ -84,62 +235,66 @@ def is_placement_valid(
 
     return True
 
-def get_placement_points(container: 'Container', existing_items: List['PlacedItem'], item_dims: Tuple[float, float, float]) -> List[Tuple[float, float, float]]:
+def _corner_points(starts: np.ndarray, ends: np.ndarray, origin: bool = True) -> np.ndarray:
+    """(Optional origin +) the 3 corner-extension points of each box, as one (1 + 3N, 3) or (3N, 3) array."""
+    n_items = len(starts)
+    offset = 1 if origin else 0
+    corners = np.empty((offset + 3 * n_items, 3), dtype=COORD_DTYPE)
+    if origin:
+        corners[0] = 0.0
+    beside_x = corners[offset:offset + n_items]
+    beside_y = corners[offset + n_items:offset + 2 * n_items]
+    beside_z = corners[offset + 2 * n_items:]
+    beside_x[:] = starts
+    beside_x[:, 0] = ends[:, 0] # (x + w, y, z)
+    beside_y[:] = starts
+    beside_y[:, 1] = ends[:, 1] # (x, y + h, z)
+    beside_z[:] = starts
+    beside_z[:, 2] = ends[:, 2] # (x, y, z + d)
+    return corners
+
+def extreme_points(item_arrays: ItemArrays) -> np.ndarray:
+    """
+    Unfiltered, unsorted extreme-point candidates: the container origin plus, for every placed
+    item, the three corners where it ends along x, y and z, each also projected down (y) and
+    toward the front (z) onto the nearest supporting face, so items settle instead of floating.
     """
-    Generates potential placement points.
-    Improvement: Instead of fixed grid, try corners of existing items or surfaces.
-    This is a simplified placeholder using a grid approach.
-    A Maximal Empty Space algorithm would be more robust here.
+    starts, ends = item_arrays.starts, item_arrays.ends
+    corners = _corner_points(starts, ends)
+    # Keep the raw corners as well as their projections onto supporting surfaces
+    return np.concatenate((
+        corners,
+        project_points(corners, starts, ends, axis=1),
+        project_points(corners, starts, ends, axis=2)
+    ))
+
+def get_placement_points(
+    container: 'Container', item_arrays: ItemArrays, candidates: Optional[np.ndarray] = None
+) -> np.ndarray:
     """
-    points = []
-    step = 5.0 # Granularity of placement grid - adjust as needed
+    Generates potential placement points as an (P, 3) array of (x, y, z), sorted by z, then y, then x.
 
+    Extreme points instead of a fixed grid (see extreme_points); `candidates` may pass them in
+    precomputed, e.g. from ContainerState.candidates, which maintains them incrementally.
+    The candidate count is O(N) in the number of placed items, independent of container size.
+    The set does not depend on the item or its rotation (search_rotations checks each rotation's
+    bounds), so callers compute it once per container and share it across rotations.
+    """
     cont_w, cont_h, cont_d = float(container.width), float(container.height), float(container.depth)
-    item_w, item_h, item_d = item_dims
-
-    # Basic grid approach (can be inefficient)
-    z = 0.0
-    while z <= cont_d - item_d:
-        y = 0.0
-        while y <= cont_h - item_h:
-            x = 0.0
-            while x <= cont_w - item_w:
-                points.append((x, y, z))
-                x += step
-            y += step
-        z += step
-
-    # Add points based on existing item surfaces (simple version)
-    for item in existing_items:
-        ix, iy, iz = float(item.pos_x), float(item.pos_y), float(item.pos_z)
-        iw, ih, _ = float(item.width), float(item.height), float(item.depth) # Assuming depth alignment needed for 'on top'
-        # Point on top of existing item
-        points.append((ix, iy, iz + float(item.depth)))
-        # Points adjacent in x/y (simplified)
-        points.append((ix + iw, iy, iz))
-        points.append((ix, iy + ih, iz))
-
-
-    # Deduplicate and return valid starting points (must be within bounds)
-    valid_points = []
-    seen = set()
-    for p in points:
-        px, py, pz = p
-        if 0 <= px < cont_w and 0 <= py < cont_h and 0 <= pz < cont_d:
-             # Check if point itself is inside another item (crude check)
-             is_inside = False
-             # *** Optimization needed here too if many items ***
-             # for other in existing_items:
-             #    if check_collision(px, py, pz, 0.1, 0.1, 0.1, other): # Check tiny cube
-             #       is_inside = True
-             #       break
-             if not is_inside and p not in seen:
-                 valid_points.append(p)
-                 seen.add(p)
-
-    # Sort points (e.g., prioritize lower Z, then Y, then X)
-    valid_points.sort(key=lambda p: (p[2], p[1], p[0]))
-    return valid_points
+    points = extreme_points(item_arrays) if candidates is None else candidates
+
+    # Keep starting points inside the container
+    inside = ((points >= 0).all(axis=1) &
+              (points[:, 0] < cont_w) & (points[:, 1] < cont_h) & (points[:, 2] < cont_d))
+    points = points[inside]
+
+    # Sort points (prioritize lower Z, then Y, then X) and drop duplicates, which are now adjacent
+    points = points[np.lexsort((points[:, 0], points[:, 1], points[:, 2]))]
+    if len(points) > 1:
+        distinct = np.ones(len(points), dtype=bool)
+        distinct[1:] = (points[1:] != points[:-1]).any(axis=1)
+        points = points[distinct]
+    return points
 
 
 def score_placement(
@@ -157,17 +312,17 @@ def score_placement(
 
     # 1. Distance Penalty (Prefer closer to origin/access point 0,0,0)
     distance = (pos_x**2 + pos_y**2 + pos_z**2)**0.5
-    score += distance * 0.1 # Weight distance less heavily
+    score += distance * DISTANCE_WEIGHT # Weight distance less heavily
 
     # 2. Preferred Zone Penalty
     if item.preferredZone and container.zone != item.preferredZone:
-        score += 100.0 # High penalty for wrong zone
+        score += ZONE_PENALTY # High penalty for wrong zone
 
     # 3. Accessibility Penalty (Simple: distance from container front)
     # Assumes access is from Z=0 face. Lower Z is better.
     # More advanced: Estimate blocking items (costly here, better done at retrieval)
     accessibility_penalty = pos_z + dim_d # Penalize based on how deep it is
-    score += accessibility_penalty * 0.5 # Weight accessibility
+    score += accessibility_penalty * ACCESSIBILITY_WEIGHT # Weight accessibility
 
     # 4. Stability Score (Optional, complex)
     # score += calculate_stability(...)
@@ -179,77 +334,162 @@ def score_placement(
 def find_best_placement_for_item(
     item: 'ItemCreate',
     containers: List['Container'],
-    all_placed_items: Dict[str, List['PlacedItem']] # Dict[container_id, list_of_items]
+    all_placed_items: Dict[str, List['PlacedItem']], # Dict[container_id, list_of_items]
+    containers_by_zone: Optional[Dict[str, List['Container']]] = None, # Precomputed by place_items
+    container_states: Optional[Dict[str, ContainerState]] = None # Used instead of all_placed_items when given
 ) -> Optional[Dict]:
     """
     Finds the best valid placement for a single item across multiple containers.
     Implements a Best Fit approach combined with scoring.
     """
-    best_placement = None
+    # The winning placement is held as primitives and only turned into a dict on return
+    best = None  # (container_id, (x, y, z), rotation, (w, h, d))
     lowest_score = float('inf')
 
-    valid_containers = [c for c in containers if not item.preferredZone or c.zone == item.preferredZone]
+    if containers_by_zone is None:
+        containers_by_zone = group_containers_by_zone(containers)
+    valid_containers = containers_by_zone.get(item.preferredZone) if item.preferredZone else None
     if not valid_containers:
          valid_containers = containers # Fallback if preferred zone not available
 
     # Sort containers (optional, e.g., by available space heuristic if calculated)
     # valid_containers.sort(key=lambda c: calculate_available_space(c), reverse=True)
 
+    # Rotated dimensions depend only on the item, so they are computed once for every container
+    rotated_dims = get_rotated_dimensions(item)
+    item_volume = float(item.width) * float(item.height) * float(item.depth)
+
     for container in valid_containers:
-        container_id_str = str(container.id) # Ensure key is string if dict expects strings
-        existing_items = all_placed_items.get(container_id_str, [])
-        logger.debug(f"Checking container {container.id} (Zone: {container.zone}) with {len(existing_items)} items for item {item.name}")
-
-        # *** Optimization: Pre-build spatial index for existing_items here ***
-        # spatial_index = build_octree(existing_items)
-
-        for rotation in get_item_rotations(item):
-            item_w, item_h, item_d = get_item_dimensions(item, rotation)
-
-            # Get potential starting points
-            potential_points = get_placement_points(container, existing_items, (item_w, item_h, item_d))
-            logger.debug(f"Container {container.id}, Rotation {rotation}: Found {len(potential_points)} potential points.")
-
-            for point in potential_points:
-                pos_x, pos_y, pos_z = point
-
-                # Check if this placement is valid (bounds and collision)
-                # Pass spatial_index if using one: is_placement_valid(..., spatial_index=spatial_index)
-                if is_placement_valid(container, existing_items, pos_x, pos_y, pos_z, item_w, item_h, item_d):
-                    # Calculate score for this valid placement
-                    current_score = score_placement(container, item, pos_x, pos_y, pos_z, item_d)
-                    logger.debug(f"Valid placement found at {point} in C{container.id}, Rot {rotation}. Score: {current_score}")
-
-                    # Best Fit Heuristic: If valid, keep the one with the lowest score found so far
-                    if current_score < lowest_score:
-                        lowest_score = current_score
-                        best_placement = {
-                            "container_id": container.id,
-                            "pos_x": pos_x,
-                            "pos_y": pos_y,
-                            "pos_z": pos_z,
-                            "rotation": rotation,
-                            "placed_width": item_w, # Store actual dimensions used
-                            "placed_height": item_h,
-                            "placed_depth": item_d,
-                            "score": current_score,
-                        }
-                        logger.info(f"New best placement found for item {item.name}: Score {current_score} in C{container.id}")
-
-                    # Original code's optimization (commented out): stop if any placement found in preferred zone
-                    # This is generally NOT Best Fit, but First Fit within preferred zone.
-                    # Keep searching for the lowest score across all valid spots.
-                    # if container.zone == item.preferredZone:
-                    #    logger.debug("Stopping search for this container (found spot in preferred zone).")
-                    #    # This break is for the points loop. Might need another flag to break container loop.
-                    #    break # Consider if this early exit is desirable vs finding the absolute best score
-
-            # If a placement was found in this container, no need to check other rotations for this container *if*
-            # the goal is just *any* placement. But for *best* placement, we must check all rotations.
-
-    if best_placement:
-        logger.info(f"Final best placement for item {item.name}: Score {best_placement['score']} in C{best_placement['container_id']}")
-    else:
-        logger.warning(f"Could not find any valid placement for item {item.name} (ID: {item.itemDefinitionId})")
-
-    return best_placement
\ No newline at end of file
+        # Built once per container (or reused from the batch state) and shared by every rotation/point check below
+        candidates = None
+        if container_states is not None and container.containerId in container_states:
+            state = container_states[container.containerId]
+            # Placed items never overlap, so an item larger than the free volume cannot fit anywhere
+            free_volume = float(container.width) * float(container.height) * float(container.depth) - state.used_volume
+            if item_volume > free_volume * (1 + VOLUME_TOLERANCE):
+                logger.debug(f"Skipping container {container.containerId}: free volume {free_volume} < {item_volume}")
+                continue
+            item_arrays, candidates = state.arrays, state.candidates
+        else:
+            item_arrays = build_item_arrays(all_placed_items.get(container.containerId, []))
+        logger.debug(f"Checking container {container.containerId} (Zone: {container.zone}) with {len(item_arrays.starts)} items for item {item.name}")
+
+        container_dims = (float(container.width), float(container.height), float(container.depth))
+        zone_penalty = ZONE_PENALTY if item.preferredZone and container.zone != item.preferredZone else 0.0
+
+        # Get potential starting points, shared by every rotation in this container
+        points = get_placement_points(container, item_arrays, candidates)
+        logger.debug(f"Container {container.containerId}: Found {len(points)} potential points.")
+        if not len(points):
+            continue
+
+        # Bounds, collision and scoring for every rotation and point in one vectorized kernel call
+        # (same weights as score_placement; ties resolve to the earlier rotation, then point)
+        current_score, rotation_idx, point_idx = search_rotations(
+            points, [dims for _, dims in rotated_dims], container_dims,
+            item_arrays.starts, item_arrays.ends, zone_penalty, min_score=lowest_score
+        )
+
+        # Best Fit Heuristic: the kernel only returns pairs beating the lowest score so far
+        if point_idx >= 0:
+            container_id = container.containerId
+            rotation, placed_dims = rotated_dims[rotation_idx]
+            lowest_score = current_score
+            best = (container_id, points[point_idx], rotation, placed_dims)
+            logger.info(f"New best placement found for item {item.name}: Score {current_score} in C{container_id}")
+
+    if best is None:
+        logger.warning(f"Could not find any valid placement for item {item.name} (ID: {item.itemId})")
+        return None
+
+    container_id, point, rotation, (item_w, item_h, item_d) = best
+    pos_x, pos_y, pos_z = (float(v) for v in point)
+    logger.info(f"Final best placement for item {item.name}: Score {lowest_score} in C{container_id}")
+    return {
+        "container_id": container_id,
+        "pos_x": pos_x,
+        "pos_y": pos_y,
+        "pos_z": pos_z,
+        "rotation": rotation,
+        "placed_width": item_w, # Store actual dimensions used
+        "placed_height": item_h,
+        "placed_depth": item_d,
+        "score": lowest_score,
+    }
+
+def group_containers_by_zone(containers: List['Container']) -> Dict[str, List['Container']]:
+    """Buckets containers by zone, preserving their input order within each zone."""
+    by_zone: Dict[str, List['Container']] = defaultdict(list)
+    for container in containers:
+        by_zone[container.zone].append(container)
+    return by_zone
+
+def order_for_placement(items: List['ItemCreate']) -> Deque['ItemCreate']:
+    """
+    Orders items for first-fit-decreasing placement: by priority (1 = highest, unset last),
+    then largest volume first within a priority.
+
+    Priorities take few distinct values, so items are bucketed by priority in one pass and
+    only each bucket is sorted by volume; the result is consumed head-first as a deque.
+    """
+    buckets: Dict[Optional[int], List['ItemCreate']] = defaultdict(list)
+    for item in items:
+        buckets[item.priority].append(item)
+    ordered: Deque['ItemCreate'] = deque()
+    for priority in sorted(buckets, key=lambda p: (p is None, p or 0)):
+        bucket = buckets[priority]
+        bucket.sort(key=lambda i: float(i.width) * float(i.height) * float(i.depth), reverse=True)
+        ordered.extend(bucket)
+    return ordered
+
+def place_items(
+    items: List['ItemCreate'], containers: List['Container'], store: Optional[ItemStore] = None,
+    stored_coords: Optional[Dict[str, np.ndarray]] = None
+) -> List[Dict]:
+    """
+    Places a batch of items one at a time with find_best_placement_for_item, in
+    order_for_placement order (highest priority first, then largest first).
+
+    The zone buckets and one ContainerState per container are built once for the whole
+    batch; each successful placement is appended to its container's state, so later items
+    see it without any regrouping or array rebuilding.
+
+    Returns one entry per placed item, with coordinates in (width, depth, height) terms:
+    {"itemId", "containerId", "position": {"startCoordinates": {...}, "endCoordinates": {...}}}
+    If `store` is given, each placement is also appended to it as one packed coords row.
+    `stored_coords` (containerId -> (N, 6) coordinate array, e.g. from crud.get_container_coords)
+    seeds each container with what it already holds; it is loaded once, never re-queried per item.
+    """
+    containers_by_zone = group_containers_by_zone(containers)
+    stored_coords = stored_coords or {}
+    states = {
+        container.containerId: ContainerState.from_stored_coords(
+            stored_coords.get(container.containerId, np.empty((0, 6), dtype=COORD_DTYPE))
+        )
+        for container in containers
+    }
+    placements = []
+
+    queue = order_for_placement(items)
+    while queue:
+        item = queue.popleft()
+        best = find_best_placement_for_item(item, containers, {}, containers_by_zone, states)
+        if not best:
+            continue
+        x, y, z = best["pos_x"], best["pos_y"], best["pos_z"]
+        w, h, d = best["placed_width"], best["placed_height"], best["placed_depth"]
+        states[best["container_id"]].append((x, y, z), (w, h, d))
+        if store is not None:
+            # Packed in (W, D, H) column order, like the items table
+            store.append(item.itemId, best["container_id"], (x, z, y, x + w, z + d, y + h))
+        # Algorithm axes: x = width, y = height, z = depth
+        placements.append({
+            "itemId": item.itemId,
+            "containerId": best["container_id"],
+            "position": {
+                "startCoordinates": {"width": x, "depth": z, "height": y},
+                "endCoordinates": {"width": x + w, "depth": z + d, "height": y + h}
+            }
+        })
+
+    return placements
\ No newline at end of file
@@ -1,113 +1,211 @@
 # backend/app/api/utils/retrieval_algorithm.py
 import logging
-from typing import List, Set
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
 from decimal import Decimal # Use Decimal for precision if needed
 
+import numpy as np
+
+from ...cache import TTLCache
+from ...item_store import COORD_DTYPE
+from ._placement_kernels import blockers_mask, blocking_pairs
+
 # Assuming schemas are defined elsewhere
 # from app.schemas import PlacedItem
 
 logger = logging.getLogger(__name__)
 
+# Path queries over at most this many boxes run as a scalar loop; NumPy's fixed per-call
+# overhead only pays off on longer slices
+SCALAR_QUERY_MAX = 12
+
+# Blocking graphs keyed by their container's box rows (see item_box_rows), so a container whose
+# contents did not change reuses its graph across searches; any move or removal changes the key
+BLOCKING_GRAPH_CACHE = TTLCache(maxsize=256, ttl=60.0)
+
+
+def item_box_rows(items: List['PlacedItem']) -> Tuple[Tuple, ...]:
+    """(id, x, y, z, w, h, d) per item: the one pass reading PlacedItem attributes for the index."""
+    return tuple((i.id, i.pos_x, i.pos_y, i.pos_z, i.width, i.height, i.depth) for i in items)
+
+class AABBIndex:
+    """
+    Spatial index over the items of one container for retrieval-path queries.
+
+    Items are kept as NumPy arrays sorted by their Z start, so the "in front of" condition of a
+    retrieval path (other_z >= start_z) is a binary search giving one contiguous slice, and only
+    that slice is tested for X-Y overlap, in one vectorized pass.
+    """
+
+    __slots__ = ('ids', 'row_of', 'boxes', 'z_starts', 'rows')
+
+    def __init__(self, items: List['PlacedItem'], rows: Optional[Tuple[Tuple, ...]] = None):
+        # Each attribute is read and converted to float exactly once (pass item_box_rows(items)
+        # as `rows` if already computed); from here on items exist only as (N, 6) float columns
+        if rows is None:
+            rows = item_box_rows(items)
+        boxes = np.array([row[1:] for row in rows], dtype=COORD_DTYPE).reshape(-1, 6)
+        boxes[:, 3:] += boxes[:, :3]
+        order = np.argsort(boxes[:, 2], kind='stable')
+        self.ids = [rows[k][0] for k in order]
+        self.row_of = {item_id: row for row, item_id in enumerate(self.ids)}
+        self.boxes = np.ascontiguousarray(boxes[order])
+        self.z_starts = self.boxes[:, 2]
+        # Python-float copy of the boxes for the scalar path of short queries
+        self.rows = self.boxes.tolist()
+
+    def query_path(self, min_x: float, max_x: float, min_y: float, max_y: float, start_z: float) -> List[int]:
+        """Returns the ids of items at or beyond start_z along Z that overlap [min_x, max_x) x [min_y, max_y)."""
+        first = int(np.searchsorted(self.z_starts, start_z, side='left'))
+        if len(self.ids) - first <= SCALAR_QUERY_MAX:
+            # A handful of boxes is cheaper to test in a plain loop than to dispatch ufuncs over
+            return [
+                self.ids[first + k] for k, (x0, y0, _, x1, y1, _) in enumerate(self.rows[first:])
+                if max(min_x, x0) < min(max_x, x1) and max(min_y, y0) < min(max_y, y1)
+            ]
+        overlaps_xy = blockers_mask(self.boxes[first:], min_x, max_x, min_y, max_y)
+        return [self.ids[first + k] for k in np.flatnonzero(overlaps_xy)]
+
+    def blockers_of(self, item_id: int) -> Set[int]:
+        """Direct blockers of an indexed item, read from its stored box (no per-query attribute conversion)."""
+        x0, y0, _, x1, y1, z1 = self.boxes[self.row_of[item_id]].tolist()
+        blockers = set(self.query_path(x0, x1, y0, y1, z1))
+        blockers.discard(item_id)
+        return blockers
+
+
+def build_aabb_index(items_in_container: List['PlacedItem']) -> AABBIndex:
+    """Builds the retrieval index for one container; build once and reuse for every query on it."""
+    return AABBIndex(items_in_container)
+
+
+def build_blocking_graph(items_in_container: List['PlacedItem']) -> Dict[int, Set[int]]:
+    """
+    Maps every item of one container to the ids of the items directly blocking it.
+    Depends only on the container's contents, so callers answering several retrieval
+    queries on the same container build it once and pass it to calculate_retrieval_steps.
+    Graphs are cached by contents (BLOCKING_GRAPH_CACHE) and shared: treat them as read-only.
+    """
+    rows = item_box_rows(items_in_container)
+    graph = BLOCKING_GRAPH_CACHE.get(rows)
+    if graph is not None:
+        return graph
+    # One vectorized pass over the (item, other) pairs instead of one path query per item
+    aabb_index = AABBIndex(items_in_container, rows)
+    ids = aabb_index.ids
+    graph = {item_id: set() for item_id in ids}
+    blocked_rows, blocker_cols = blocking_pairs(aabb_index.boxes)
+    for row, col in zip(blocked_rows.tolist(), blocker_cols.tolist()):
+        graph[ids[row]].add(ids[col])
+    BLOCKING_GRAPH_CACHE.set(rows, graph)
+    return graph
+
+
 def get_blocking_items(
     target_item: 'PlacedItem',
-    items_in_container: List['PlacedItem']
+    items_in_container: List['PlacedItem'],
+    aabb_index: Optional[AABBIndex] = None
 ) -> Set[int]:
     """
     Identifies items directly blocking the target item based on a 'straight out' retrieval path.
     Assumes retrieval is along the positive Z axis relative to the item's placed position.
+    Pass `aabb_index` (from build_aabb_index) when querying the same container repeatedly.
     """
-    blocking_items_ids = set()
+    if aabb_index is None:
+        aabb_index = build_aabb_index(items_in_container)
+    if target_item.id in aabb_index.row_of:
+        blocking_items_ids = aabb_index.blockers_of(target_item.id)
+        if blocking_items_ids:
+            logger.debug(f"Items {blocking_items_ids} block target {target_item.id}")
+        return blocking_items_ids
+
+    # Target outside the index: derive its retrieval path from the object itself
     target_x, target_y, target_z = float(target_item.pos_x), float(target_item.pos_y), float(target_item.pos_z)
     target_w, target_h, target_d = float(target_item.width), float(target_item.height), float(target_item.depth)
 
-    # Define the retrieval volume/path in front of the target item
-    # This volume extends from target_z + target_d outwards along Z.
-    retrieval_min_x = target_x
-    retrieval_max_x = target_x + target_w
-    retrieval_min_y = target_y
-    retrieval_max_y = target_y + target_h
-    retrieval_start_z = target_z + target_d
-
-    # *** EFFICIENCY BOTTLENECK ***
-    # Iterating through all items is O(N).
-    # Replace this loop with a spatial index query for the retrieval volume.
-    # spatial_index.query_region(retrieval_bounding_box) -> potential blockers
-
-    for other_item in items_in_container:
-        if other_item.id == target_item.id:
-            continue # Don't check against self
-
-        other_x, other_y, other_z = float(other_item.pos_x), float(other_item.pos_y), float(other_item.pos_z)
-        other_w, other_h, other_d = float(other_item.width), float(other_item.height), float(other_item.depth)
-
-        # Check if 'other_item' intersects the retrieval path/volume
-        # 1. Is it in front of the target item along the retrieval axis (Z)?
-        is_in_front = other_z >= retrieval_start_z
-
-        # 2. Does it overlap in the X-Y plane within the target's width/height?
-        overlaps_xy = (max(retrieval_min_x, other_x) < min(retrieval_max_x, other_x + other_w) and
-                       max(retrieval_min_y, other_y) < min(retrieval_max_y, other_y + other_h))
-
-        if is_in_front and overlaps_xy:
-             # More precise check: Does any part of other_item block the *entire* face?
-             # For simplicity here, any overlap in front is considered blocking.
-             # A more complex check might be needed depending on exact rules.
-            logger.debug(f"Item {other_item.id} blocks target {target_item.id}")
-            blocking_items_ids.add(other_item.id)
-
+    # The retrieval volume extends from target_z + target_d outwards along Z, across the
+    # target's width and height. Any overlap in front is considered blocking.
+    blocking_items_ids = set(aabb_index.query_path(
+        target_x, target_x + target_w, target_y, target_y + target_h, target_z + target_d
+    ))
+    blocking_items_ids.discard(target_item.id) # Don't count the item itself
+    if blocking_items_ids:
+        logger.debug(f"Items {blocking_items_ids} block target {target_item.id}")
     return blocking_items_ids
 
 
-def calculate_retrieval_steps(
+def get_items_to_move(
     target_item_id: int,
     all_placed_items_map: Dict[int, 'PlacedItem'], # Map item_id -> PlacedItem object
-    items_by_container: Dict[str, List['PlacedItem']] # Map container_id -> List[PlacedItem]
-) -> int:
+    items_by_container: Dict[str, List['PlacedItem']], # Map container_id -> List[PlacedItem]
+    blocking_graph: Optional[Dict[int, Set[int]]] = None # From build_blocking_graph for the target's container
+) -> Optional[Tuple[int, ...]]:
     """
-    Calculates the number of items that need to be moved to retrieve the target item.
-    Uses a recursive approach to find nested blocking items.
+    Returns the ids of every item that must be moved to retrieve the target, in breadth-first
+    order (direct blockers first, then the blockers of those), as an immutable tuple.
+    Returns None if the target or its container is unknown.
+    With `blocking_graph`, blockers are looked up instead of recomputed from the geometry.
     """
     if target_item_id not in all_placed_items_map:
         logger.error(f"Target item ID {target_item_id} not found in placed items map.")
-        return float('inf') # Or raise error
+        return None
 
     target_item = all_placed_items_map[target_item_id]
     container_id_str = str(target_item.container_id)
 
     if container_id_str not in items_by_container:
          logger.error(f"Container ID {container_id_str} for item {target_item_id} not found.")
-         return float('inf') # Or raise error
+         return None
 
     items_in_container = items_by_container[container_id_str]
 
-    # *** Optimization: Pre-build spatial index for items_in_container here if not done globally ***
-    # spatial_index = build_octree(items_in_container)
-    # direct_blockers = get_blocking_items(target_item, items_in_container, spatial_index)
+    # Built once (only when no precomputed graph is given); every blocker lookup below is a query against it
+    aabb_index = build_aabb_index(items_in_container) if blocking_graph is None else None
 
-    items_to_move = set()
-    queue = {target_item_id} # Start with the target itself (doesn't count as move, but initiates check)
-    processed = set()
+    # Breadth-first over the blocking graph; an item is enqueued at most once, so its
+    # blockers are computed at most once
+    items_to_move = []
+    queue = deque([target_item_id]) # Start with the target itself (doesn't count as move, but initiates check)
+    enqueued = {target_item_id}
 
     while queue:
-        current_item_id = queue.pop()
-        if current_item_id in processed:
-            continue
-        processed.add(current_item_id)
+        current_item_id = queue.popleft()
 
         if current_item_id not in all_placed_items_map:
             logger.warning(f"Item ID {current_item_id} (needed for retrieval path) not found.")
             continue
 
-        current_item = all_placed_items_map[current_item_id]
-
-        # Find items directly blocking the current item
-        # Pass spatial_index if available: direct_blockers = get_blocking_items(current_item, items_in_container, spatial_index)
-        direct_blockers = get_blocking_items(current_item, items_in_container)
+        # Find items directly blocking the current item, from the graph or straight from the index rows
+        if blocking_graph is not None and current_item_id in blocking_graph:
+            direct_blockers = blocking_graph[current_item_id]
+        elif blocking_graph is not None:
+            direct_blockers = get_blocking_items(all_placed_items_map[current_item_id], items_in_container)
+        elif current_item_id in aabb_index.row_of:
+            direct_blockers = aabb_index.blockers_of(current_item_id)
+        else:
+            direct_blockers = get_blocking_items(all_placed_items_map[current_item_id], items_in_container, aabb_index)
 
         for blocker_id in direct_blockers:
-            if blocker_id not in processed:
-                items_to_move.add(blocker_id) # This item needs to be moved
-                queue.add(blocker_id) # We need to check what blocks this blocker
+            if blocker_id not in enqueued:
+                enqueued.add(blocker_id)
+                items_to_move.append(blocker_id) # This item needs to be moved
+                queue.append(blocker_id) # We need to check what blocks this blocker
 
     logger.info(f"Retrieval steps for item {target_item_id}: {len(items_to_move)} items need moving: {items_to_move}")
-    return len(items_to_move)
\ No newline at end of file
+    return tuple(items_to_move)
+
+
+def calculate_retrieval_steps(
+    target_item_id: int,
+    all_placed_items_map: Dict[int, 'PlacedItem'], # Map item_id -> PlacedItem object
+    items_by_container: Dict[str, List['PlacedItem']], # Map container_id -> List[PlacedItem]
+    blocking_graph: Optional[Dict[int, Set[int]]] = None # From build_blocking_graph for the target's container
+) -> int:
+    """
+    Calculates the number of items that need to be moved to retrieve the target item.
+    Follows blockers of blockers breadth-first to find nested blocking items.
+    """
+    items_to_move = get_items_to_move(target_item_id, all_placed_items_map, items_by_container, blocking_graph)
+    if items_to_move is None:
+        return float('inf') # Or raise error
+    return len(items_to_move)
@@ -1,19 +1,41 @@
 # backend/app/api/utils/search.py
+import base64
+import heapq
 import logging
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime, timezone
 from decimal import Decimal
 
+import numpy as np
+
 # Assuming schemas and retrieval_algorithm are available
 # from app.schemas import PlacedItem, ItemDefinition
-from .retrieval_algorithm import calculate_retrieval_steps
+from .retrieval_algorithm import build_blocking_graph, calculate_retrieval_steps
 
 logger = logging.getLogger(__name__)
 
+SECONDS_PER_DAY = 60 * 60 * 24
+
+def utc_timestamp(dt: datetime) -> float:
+    """
+    Unix time of `dt`. Naive datetimes are taken as UTC (adjust if needed); this is the only
+    place that fixes up missing timezone info, and it runs once per value, at load time.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def expiry_timestamp(item_definition: 'ItemDefinition') -> Optional[float]:
+    """Unix time of a definition's expiry date, or None if it has none."""
+    expiry_dt = item_definition.expiryDate if item_definition else None
+    return utc_timestamp(expiry_dt) if expiry_dt else None
+
 def calculate_search_score(
     item: 'PlacedItem',
     item_definition: 'ItemDefinition',
-    retrieval_steps: int
+    retrieval_steps: int,
+    now_ts: Optional[float] = None, # Unix time of "now"; pass it when scoring many items
+    expiry_ts: Optional[float] = None # Precomputed expiry_timestamp(item_definition)
 ) -> float:
     """
     Calculates a search score for an item. Lower is better (easier/faster to get).
@@ -34,28 +56,50 @@ def calculate_search_score(
     # 3. Expiry Proximity (Tertiary factor)
     # Penalize items expiring very soon if we DON'T want them now
     # Or reward them if the search implies urgency? Let's penalize for now.
-    if item_definition and item_definition.expiryDate:
+    if expiry_ts is None and item_definition and item_definition.expiryDate:
         try:
-            # Ensure expiryDate is offset-aware for comparison
-            expiry_dt = item_definition.expiryDate
-            if expiry_dt.tzinfo is None:
-                 # Assume UTC if timezone info is missing (adjust if needed)
-                 expiry_dt = expiry_dt.replace(tzinfo=timezone.utc)
-
-            now_dt = datetime.now(timezone.utc)
-            time_to_expiry = expiry_dt - now_dt
-            days_to_expiry = time_to_expiry.total_seconds() / (60 * 60 * 24)
-
-            if days_to_expiry < 0:
-                score += 1000.0 # Heavily penalize already expired
-            elif days_to_expiry < 7:
-                score += (7 - days_to_expiry) * 2.0 # Minor penalty for expiring soon
+            expiry_ts = expiry_timestamp(item_definition)
         except Exception as e:
             logger.warning(f"Could not parse expiry date for scoring item {item.id}: {e}")
+    if expiry_ts is not None:
+        if now_ts is None:
+            now_ts = datetime.now(timezone.utc).timestamp()
+        # Plain float arithmetic on unix times; no datetime/timedelta objects per item
+        days_to_expiry = (expiry_ts - now_ts) / SECONDS_PER_DAY
+
+        if days_to_expiry < 0:
+            score += 1000.0 # Heavily penalize already expired
+        elif days_to_expiry < 7:
+            score += (7 - days_to_expiry) * 2.0 # Minor penalty for expiring soon
 
     # logger.debug(f"Item {item.id}: Steps={retrieval_steps}, Prio={priority}, Score={score}")
     return score
 
+def encode_blocking_mask(blocker_ids: Iterable, index_of: Dict, n_items: int) -> bytes:
+    """
+    Packs blocker IDs into SearchResultItem.blocking_mask: a little-endian bitset of
+    ceil(n_items / 8) bytes where bit index_of[id] is set for every blocker.
+    """
+    bits = np.zeros(n_items, dtype=bool)
+    bits[[index_of[blocker_id] for blocker_id in blocker_ids]] = True
+    return np.packbits(bits, bitorder='little').tobytes()
+
+def search_scores(
+    retrieval_steps: np.ndarray,
+    priorities: np.ndarray,
+    expiry_ts: np.ndarray, # NaN where the definition has no expiry date
+    now_ts: float
+) -> np.ndarray:
+    """
+    calculate_search_score over whole columns at once. Same operations in the same order, so
+    every score agrees bit for bit with the scalar function.
+    """
+    days_to_expiry = (expiry_ts - now_ts) / SECONDS_PER_DAY
+    # NaN compares False, so items without an expiry get no penalty
+    expiry_penalty = np.where(days_to_expiry < 0, 1000.0,
+                              np.where(days_to_expiry < 7, (7 - days_to_expiry) * 2.0, 0.0))
+    return (0.0 + retrieval_steps * 10.0) + priorities * 5.0 + expiry_penalty
+
 def search_items(
     all_placed_items: List['PlacedItem'], # Flat list of all placed items
     all_definitions: Dict[int, 'ItemDefinition'], # Map definition_id -> definition
@@ -67,17 +111,29 @@ def search_items(
     container_id: Optional[int] = None,
     expires_before: Optional[datetime] = None,
     expires_after: Optional[datetime] = None,
-    sort_by_score: bool = True
+    sort_by_score: bool = True,
+    limit: Optional[int] = None,
+    now: Optional[datetime] = None # Request-scoped "now"; read from the clock once if not given
 ) -> List[Dict]:
     """
     Searches for items based on criteria and calculates retrieval steps and score.
+    With `limit`, at most `limit` results are returned: the best-scored ones when sort_by_score
+    (kept in a bounded heap, O(N log limit) instead of sorting every match, and matches that
+    provably cannot make the cut are never scored), otherwise the first ones in filter order.
     """
+    if limit is not None and limit <= 0:
+        return []
     results = []
-    # Ensure timezone awareness for comparisons if provided
-    if expires_before and expires_before.tzinfo is None:
-        expires_before = expires_before.replace(tzinfo=timezone.utc)
-    if expires_after and expires_after.tzinfo is None:
-        expires_after = expires_after.replace(tzinfo=timezone.utc)
+    matches = [] # (item, definition, expiry_ts) for each item passing every filter
+    # Every datetime is normalized to a UTC unix time once, up front; every expiry
+    # comparison below is float arithmetic with no timezone handling
+    expires_before_ts = utc_timestamp(expires_before) if expires_before else None
+    expires_after_ts = utc_timestamp(expires_after) if expires_after else None
+    now_ts = utc_timestamp(now) if now else datetime.now(timezone.utc).timestamp()
+    expiry_by_definition: Dict[int, Optional[float]] = {} # definition_id -> expiry unix time
+    # Case-insensitive name filter: the query is folded once, each definition name at most once
+    pattern = query.casefold() if query else None
+    name_matches: Dict[int, bool] = {} # definition_id -> name contains the query
 
     # *** Optimization: If filtering significantly reduces the item list,
     # apply filters *before* calculating retrieval steps. ***
@@ -93,8 +149,13 @@ def search_items(
             continue # Skip items without definitions if necessary for filtering
 
         # --- Apply Filters ---
-        if query and query.lower() not in definition.name.lower():
-            continue
+        if pattern:
+            # Evaluated once per definition; placed items sharing a definition reuse the answer
+            name_match = name_matches.get(item.item_definition_id)
+            if name_match is None:
+                name_match = name_matches[item.item_definition_id] = pattern in definition.name.casefold()
+            if not name_match:
+                continue
         if container_id is not None and item.container_id != container_id:
             continue
         if min_priority is not None and definition.priority < min_priority:
@@ -102,23 +163,83 @@ def search_items(
         if max_priority is not None and definition.priority > max_priority:
             continue
 
-        # Date Filtering (handle timezone)
-        item_expiry_dt = definition.expiryDate
-        if item_expiry_dt and item_expiry_dt.tzinfo is None:
-             item_expiry_dt = item_expiry_dt.replace(tzinfo=timezone.utc) # Assume UTC
+        # Date Filtering (handle timezone), converted once per definition
+        if item.item_definition_id not in expiry_by_definition:
+            try:
+                expiry_by_definition[item.item_definition_id] = expiry_timestamp(definition)
+            except Exception as e:
+                logger.warning(f"Could not parse expiry date of item definition {item.item_definition_id}: {e}")
+                expiry_by_definition[item.item_definition_id] = None
+        expiry_ts = expiry_by_definition[item.item_definition_id]
 
-        if expires_before and (not item_expiry_dt or item_expiry_dt >= expires_before):
+        if expires_before_ts is not None and (expiry_ts is None or expiry_ts >= expires_before_ts):
             continue
-        if expires_after and (not item_expiry_dt or item_expiry_dt <= expires_after):
+        if expires_after_ts is not None and (expiry_ts is None or expiry_ts <= expires_after_ts):
              continue
 
-        # --- Calculate Steps and Score ---
+        matches.append((item, definition, expiry_ts))
+
+    # --- Calculate Steps and Score ---
+    # Retrieval steps only ever add to the score, so a match's score with zero steps is a lower
+    # bound on its real score. With a limit, matches are scored lowest bound first, and scoring
+    # stops once no remaining match can beat the limit-th best result found so far.
+    bounded = limit is not None and sort_by_score
+    # Score inputs as flat columns, pulled off the matches once for the vectorized scoring
+    priorities = np.array([definition.priority for _, definition, _ in matches], dtype=np.float64)
+    expiries = np.array([np.nan if expiry_ts is None else expiry_ts for _, _, expiry_ts in matches], dtype=np.float64)
+    if bounded:
+        bounds_arr = search_scores(np.zeros(len(matches)), priorities, expiries, now_ts)
+        order = np.argsort(bounds_arr, kind='stable').tolist()
+        bounds = bounds_arr.tolist()
+    else:
+        # Unsorted results come back in filter order, so only the first `limit` matches are scored
+        order = range(len(matches) if limit is None else min(len(matches), limit))
+    scored = [] # (score, index into matches, retrieval_steps); result dicts are built only for what is returned
+    unbounded_steps = [] # (index, retrieval_steps), scored in one vectorized pass after the loop
+    best = [] # Heap of (-score, -index, retrieval_steps): the worst of the `limit` best matches on top
+
+    # The blocking graph depends only on a container's contents, so it is built once per
+    # container holding a scored match and shared by every match in that container
+    blocking_graphs = {}
+    for index in order:
+        item, definition, expiry_ts = matches[index]
+        if bounded and len(best) == limit and bounds[index] > -best[0][0]:
+            break
+
+        container_key = str(item.container_id)
+        if container_key not in blocking_graphs and container_key in items_by_container:
+            blocking_graphs[container_key] = build_blocking_graph(items_by_container[container_key])
+
         logger.debug(f"Calculating steps for filtered item {item.id}")
-        # This is the most expensive part
-        retrieval_steps = calculate_retrieval_steps(item.id, all_placed_items_map, items_by_container)
+        retrieval_steps = calculate_retrieval_steps(
+            item.id, all_placed_items_map, items_by_container, blocking_graphs.get(container_key)
+        )
 
-        score = calculate_search_score(item, definition, retrieval_steps)
+        if not bounded:
+            unbounded_steps.append((index, retrieval_steps))
+            continue
+        score = calculate_search_score(item, definition, retrieval_steps, now_ts, expiry_ts)
+        if len(best) < limit:
+            heapq.heappush(best, (-score, -index, retrieval_steps))
+        elif (score, index) < (-best[0][0], -best[0][1]):
+            heapq.heapreplace(best, (-score, -index, retrieval_steps))
+
+    if bounded:
+        scored = [(-neg_score, -neg_index, retrieval_steps) for neg_score, neg_index, retrieval_steps in best]
+    elif unbounded_steps:
+        indices = [index for index, _ in unbounded_steps]
+        steps = [retrieval_steps for _, retrieval_steps in unbounded_steps]
+        scores = search_scores(np.array(steps, dtype=np.float64), priorities[indices], expiries[indices], now_ts)
+        scored = list(zip(scores.tolist(), indices, steps))
+
+    # --- Sort Results ---
+    if sort_by_score:
+        # Ties keep their filter order, as a stable sort on the score alone would
+        scored.sort(key=lambda entry: (entry[0], entry[1]))
 
+    # --- Build Results ---
+    for score, index, retrieval_steps in scored:
+        item, definition, _ = matches[index]
         results.append({
             "placed_item_id": item.id,
             "item_name": definition.name,
@@ -130,13 +251,29 @@ def search_items(
             "priority": definition.priority,
             "expiry_date": definition.expiryDate,
             "retrieval_steps": retrieval_steps,
+            # Direct blockers, from the container's (cached) blocking graph; pack_search_response
+            # turns them into a blocking_mask over one item index shared by the whole response
+            "blocking_items": sorted(blocking_graphs.get(str(item.container_id), {}).get(item.id, ())),
             "search_score": score,
             # Include other relevant fields from PlacedItem or ItemDefinition
         })
 
-    # --- Sort Results ---
-    if sort_by_score:
-        results.sort(key=lambda r: r['search_score'])
-
     logger.info(f"Search complete. Found {len(results)} items.")
-    return results
\ No newline at end of file
+    return results
+
+def pack_search_response(results: List[Dict]) -> Dict:
+    """
+    Wire form of search_items' results: {"item_index": [...], "results": [...]}, where item_index
+    lists every item ID blocking any result, once, and each result's "blocking_items" is replaced
+    by "blocking_mask", its bitset over item_index (encode_blocking_mask) as standard base64,
+    the same text schemas.SearchResultItem reads and writes. JSON-ready as returned (orjson).
+    """
+    item_index = sorted({blocker_id for result in results for blocker_id in result["blocking_items"]})
+    index_of = {item_id: i for i, item_id in enumerate(item_index)}
+    packed = []
+    for result in results:
+        entry = {key: value for key, value in result.items() if key != "blocking_items"}
+        mask = encode_blocking_mask(result["blocking_items"], index_of, len(item_index))
+        entry["blocking_mask"] = base64.b64encode(mask).decode('ascii')
+        packed.append(entry)
+    return {"item_index": [str(item_id) for item_id in item_index], "results": packed}
@@ -1,16 +1,32 @@
 # backend/app/api/waste.py
 
-from fastapi import APIRouter, Depends, HTTPException, Body
+from functools import lru_cache
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Body, Response
+from pydantic import BaseModel, TypeAdapter
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import date, datetime
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timezone
 
 # Adjust imports based on your project structure
-from app import crud, schemas
+from app import crud, crud_orm, schemas
+from app.api.schemas import Log
 from app.database import SessionLocal
 
 router = APIRouter()
 
+# WasteItem fields read off a PlacedItem row (days_to_expiry is computed, not stored)
+_PLACED_ITEM_FIELDS = tuple(schemas.PlacedItem.model_fields)
+
+@lru_cache(maxsize=None)
+def _waste_items_adapter() -> TypeAdapter:
+    """
+    Serializes the identify response in one pydantic-core call (see get_waste_items).
+    Built on first use and then reused, so WasteItem's deferred schema is not built at import.
+    """
+    return TypeAdapter(List[schemas.WasteItem])
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -20,95 +36,100 @@ def get_db():
         db.close()
 
 
+def _json_response(model: BaseModel) -> Response:
+    """
+    A response whose body pydantic-core encodes straight to JSON bytes; FastAPI would otherwise
+    re-validate the model against response_model and walk it into dicts before encoding.
+    """
+    return Response(model.model_dump_json(), media_type="application/json")
+
+
+# --- Helper Function to Log Waste Actions ---
+
+def log_waste_action(log: schemas.LogCreate) -> None:
+    """
+    Writes a waste action to the action log served by /api/logs.
+    crud.create_log takes the entry alone and uses its own connection; the endpoints' ORM
+    session must not be passed to it, so the session only ever reaches crud_orm functions.
+    """
+    crud.create_log(Log(
+        timestamp=datetime.now(timezone.utc),
+        userId=log.userId,
+        actionType=log.action.value,
+        details={"details": log.details}
+    ))
+
+
 # --- Helper Function to Identify Waste ---
 
-def identify_waste_items(db: Session) -> List[schemas.WasteItem]:
+def identify_waste_with_mass(
+    db: Session, exclude_container_id: Optional[str] = None
+) -> List[Tuple[schemas.WasteItem, float]]:
     """
-    Identifies all items considered waste based on expiry date or usage limit.
+    Identifies all items considered waste based on expiry date or usage limit, each paired
+    with its mass.
     Note: Requires ItemDefinition model to have 'expiryDate' and 'usageLimit',
           and PlacedItem model to track current usage if usageLimit is used.
           This example primarily focuses on expiry date.
+    The waste predicate runs in the database, so only waste rows (already joined with their
+    definitions, which carry the mass) are transferred; items in `exclude_container_id` are
+    left out as well. One pass serves both the identify and the plan_return endpoints.
     """
     waste_items = []
-    all_placed = crud.get_all_placed_items(db)
     today = date.today()
-
-    item_definitions_cache = {} # Cache definitions to avoid repeated DB calls
-
-    for placed_item in all_placed:
-        is_waste = False
-        reason = ""
-        days_to_expiry: Optional[float] = None
-
-        # Get item definition details (expiry, usage limit, mass etc.)
-        if placed_item.itemId not in item_definitions_cache:
-             item_def = crud.get_item_definition(db, item_id=placed_item.itemId)
-             if not item_def:
-                 # Log warning: Placed item exists without definition?
-                 print(f"Warning: Item definition not found for placed item ID {placed_item.itemId}")
-                 continue
-             item_definitions_cache[placed_item.itemId] = item_def
-        else:
-            item_def = item_definitions_cache[placed_item.itemId]
-
-
-        # 1. Check Expiry Date
-        if item_def.expiryDate:
-            try:
-                expiry_date = item_def.expiryDate # Assuming it's already a date object from DB/Schema
-                delta = expiry_date - today
-                days_to_expiry = float(delta.days)
-                if delta.days < 0:
-                    is_waste = True
-                    reason = f"Expired on {expiry_date.isoformat()}"
-            except Exception as e:
-                 # Log error parsing date
-                 print(f"Error processing expiry date for {item_def.itemId}: {e}")
-                 days_to_expiry = None # Mark as unknown
-
-        # 2. Check Usage Limit (requires PlacedItem model to track usage)
-        # Example: Assumes PlacedItem has a 'current_usage' field
-        # if item_def.usageLimit is not None and hasattr(placed_item, 'current_usage'):
-        #    if placed_item.current_usage >= item_def.usageLimit:
-        #        if not is_waste: # Avoid duplicating if already expired
-        #            is_waste = True
-        #            reason = f"Usage limit ({item_def.usageLimit}) reached"
-        #        else:
-        #            reason += f"; Usage limit ({item_def.usageLimit}) reached"
-
-        if is_waste:
-             # Convert PlacedItem DB model to PlacedItem schema
-             placed_item_schema = schemas.PlacedItem.model_validate(placed_item)
-
-             # Create WasteItem schema (inherits from PlacedItem)
-             waste_item_schema = schemas.WasteItem(
-                 **placed_item_schema.model_dump(), # Unpack fields from PlacedItem
-                 days_to_expiry=days_to_expiry
-                 # Add reason field to WasteItem schema if desired
-             )
-             waste_items.append(waste_item_schema)
+    rows = crud_orm.get_waste_placed_items(db, today, exclude_container_id)
+    if not rows:
+        return waste_items
+
+    # 1. Expiry Date: the query only returns items whose expiryDate is before today, so only
+    #    the days to expiry are left to compute, for every row in one vectorized subtraction
+    expiry_dates = np.array([item_def.expiryDate for _, item_def in rows], dtype='datetime64[D]')
+    days_to_expiry = (expiry_dates - np.datetime64(today, 'D')).astype(np.float64).tolist()
+
+    # 2. Usage Limit (requires PlacedItem model to track usage): add the condition to
+    #    crud_orm.get_waste_placed_items so it is also evaluated by the database
+
+    for (placed_item, item_def), days in zip(rows, days_to_expiry):
+        # Only waste rows are converted, straight from the DB model into WasteItem (inherits from
+        # PlacedItem). The row is trusted, so it is constructed without validation and without an
+        # intermediate copy; Add reason field to WasteItem schema if desired
+        waste_item_schema = schemas.WasteItem.model_construct(
+            days_to_expiry=days, **{field: getattr(placed_item, field) for field in _PLACED_ITEM_FIELDS}
+        )
+        waste_items.append((waste_item_schema, item_def.mass))
 
     return waste_items
 
 
+def identify_waste_items(db: Session, exclude_container_id: Optional[str] = None) -> List[schemas.WasteItem]:
+    """Identifies all items considered waste (see identify_waste_with_mass), without their mass."""
+    return [item for item, _ in identify_waste_with_mass(db, exclude_container_id)]
+
+
 # --- API Endpoints ---
 
+# The handlers below are plain `def`: the SQLAlchemy session is synchronous, so FastAPI runs
+# them in its threadpool instead of letting blocking queries stall the event loop
 @router.get("/waste/identify", response_model=List[schemas.WasteItem])
-async def get_waste_items(
+def get_waste_items(
     userId: str, # For logging
     db: Session = Depends(get_db)
 ):
-    """Identifies and returns a list of all items currently considered waste."""
+    """
+    Identifies and returns a list of all items currently considered waste.
+    The list is dumped straight to JSON bytes by one TypeAdapter call (as in _json_response);
+    response_model is kept for the OpenAPI schema.
+    """
     waste = identify_waste_items(db)
 
     # Log the action
-    crud.create_log(db, schemas.LogCreate(userId=userId, action="Identify Waste", details=f"Found {len(waste)} waste items."))
+    log_waste_action(schemas.LogCreate(userId=userId, action=schemas.ActionType.IDENTIFY_WASTE, details=f"Found {len(waste)} waste items."))
 
-    return waste
+    return Response(_waste_items_adapter().dump_json(waste), media_type="application/json")
 
 
 @router.post("/waste/plan_return", response_model=schemas.WastePlanResponse)
-async def plan_waste_return(
+def plan_waste_return(
     plan_request: schemas.WastePlanRequest,
     db: Session = Depends(get_db)
 ):
@@ -121,65 +142,44 @@ async def plan_waste_return(
     target_container_id = plan_request.undocking_container_id
     user_id = plan_request.userId
 
-    # 1. Identify all potential waste items
-    all_waste = identify_waste_items(db)
+    # 1. Identify all potential waste items, 2. leaving out items already in the target
+    # container, 3. with the mass of each (all from the same joined query)
+    candidates_with_mass = identify_waste_with_mass(db, exclude_container_id=target_container_id)
 
-    # 2. Filter out items already in the target container
-    candidate_waste = [
-        item for item in all_waste if item.containerId != target_container_id
-    ]
-
-    if not candidate_waste:
+    if not candidates_with_mass:
          # Log the action
-         crud.create_log(db, schemas.LogCreate(userId=user_id, action="Plan Waste Return", details=f"No waste items found eligible for move to {target_container_id}."))
-         return schemas.WastePlanResponse(items_to_move=[], total_items=0, total_weight=0.0)
-
-    # 3. Get mass for each candidate item (requires accessing ItemDefinition)
-    candidates_with_mass = []
-    item_definitions_cache = {}
-    for item in candidate_waste:
-         if item.itemId not in item_definitions_cache:
-             item_def = crud.get_item_definition(db, item_id=item.itemId)
-             if not item_def:
-                 print(f"Warning: Item definition not found for waste item ID {item.itemId}")
-                 continue
-             item_definitions_cache[item.itemId] = item_def
-         else:
-             item_def = item_definitions_cache[item.itemId]
-
-         candidates_with_mass.append({
-             "item": item, # The full WasteItem schema object
-             "mass": item_def.mass
-         })
-
-    # 4. Sort candidates by mass (ascending) - Greedy approach for max count
-    sorted_candidates = sorted(candidates_with_mass, key=lambda x: x["mass"])
-
-    # 5. Select items greedily
+         log_waste_action(schemas.LogCreate(userId=user_id, action=schemas.ActionType.PLAN_WASTE_RETURN, details=f"No waste items found eligible for move to {target_container_id}."))
+         return _json_response(schemas.WastePlanResponse(items_to_move=[], total_items=0, total_weight=0.0))
+
+    # 4. Sort on mass (ascending) - Greedy approach for max count
+    # Taking the lightest items first is exactly optimal when the objective is the number of
+    # items (any feasible set of k items weighs at least the k lightest), so no knapsack DP is needed.
+    # Equal masses are ordered by itemId so the plan does not depend on the order rows come back
+    # from the database. The sort and the running total are single NumPy passes over the masses,
+    # so no Python-level work is done per candidate until the selected items are built.
+    masses = np.array([mass for _, mass in candidates_with_mass], dtype=np.float64)
+    item_ids = np.array([item.itemId for item, _ in candidates_with_mass])
+    order = np.lexsort((item_ids, masses)) # Last key is the primary one; stable for full ties
+    running_weight = np.cumsum(masses[order])
+
+    # 5. Select items greedily: the longest lightest-first prefix whose total fits.
+    # If we wanted to maximize *weight* instead of count, we'd need knapsack DP.
+    selected_count = int(np.searchsorted(running_weight, max_weight, side='right'))
+    current_weight = float(running_weight[selected_count - 1]) if selected_count else 0.0
     selected_items_for_plan: List[schemas.WastePlanResponseItem] = []
-    current_weight = 0.0
-
-    for candidate in sorted_candidates:
-        item_mass = candidate["mass"]
-        item_data = candidate["item"]
-
-        if current_weight + item_mass <= max_weight:
-            selected_items_for_plan.append(schemas.WastePlanResponseItem(
-                itemId=item_data.itemId,
-                name=item_data.name,
-                from_containerId=item_data.containerId,
-                mass=item_mass
-            ))
-            current_weight += item_mass
-        else:
-            # Since sorted by ascending weight, no heavier item will fit either.
-            # If we wanted to maximize *weight* instead of count, we'd need knapsack DP.
-            pass # Continue checking smaller items if any remain (though unlikely with this sort)
+    for index in order[:selected_count].tolist():
+        item_data, item_mass = candidates_with_mass[index]
+        selected_items_for_plan.append(schemas.WastePlanResponseItem(
+            itemId=item_data.itemId,
+            name=item_data.name,
+            from_containerId=item_data.containerId,
+            mass=item_mass
+        ))
 
     # Log the action
-    crud.create_log(db, schemas.LogCreate(
+    log_waste_action(schemas.LogCreate(
         userId=user_id,
-        action="Plan Waste Return",
+        action=schemas.ActionType.PLAN_WASTE_RETURN,
         details=(
             f"Planned move of {len(selected_items_for_plan)} items "
             f"(Total Weight: {current_weight:.2f} / {max_weight:.2f} kg) "
@@ -188,9 +188,9 @@ async def plan_waste_return(
     ))
 
     # 6. Return the plan
-    return schemas.WastePlanResponse(
+    return _json_response(schemas.WastePlanResponse(
         items_to_move=selected_items_for_plan,
         total_items=len(selected_items_for_plan),
         total_weight=current_weight
-    )
+    ))
 
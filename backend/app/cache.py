@@ -0,0 +1,90 @@
+"""
+Small in-process TTL cache for hot read queries.
+
+Dashboards poll /api/logs far more often than the logs change, so identical
+reads within a few seconds are answered from memory. Writers clear the matching cache, so
+a cached result is never older than the last write made through this process.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """LRU mapping whose entries expire `ttl` seconds after they are stored. Safe to share between threads."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Lookup counters, e.g. to judge whether prefetching into the cache pays off
+        self.hits = 0
+        self.misses = 0
+        # Bumped by every invalidation, so a value computed before one can be told apart (see set)
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Stores `value`. With `generation` (self.generation read before the value was computed),
+        the value is dropped instead if the cache was invalidated meanwhile, since it may predate
+        the write that invalidated it.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Drops one entry (if present) and bumps the generation, for writers that change a single key."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self.generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+
+_MISSING = object()
+
+
+def ttl_cached(cache: TTLCache) -> Callable:
+    """
+    Memoizes a function in `cache`, keyed by its normalized arguments (keyword order does not matter).
+    Cached results are shared between callers and must be treated as read-only. A result whose
+    computation overlapped a clear() is returned but not cached: it may miss the write that cleared.
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                generation = cache.generation
+                value = func(*args, **kwargs)
+                cache.set(key, value, generation)
+            return value
+        return wrapper
+    return decorator
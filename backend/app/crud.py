@@ -1,189 +1,454 @@
 # backend/app/crud.py
+"""SQLite CRUD for items, containers and logs. The SQLAlchemy variant lives in crud_orm.py."""
 import logging
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from datetime import datetime, timezone
+import sqlite3
+import calendar
+import threading
+from functools import lru_cache
+import orjson
+import numpy as np
+from typing import List, Optional, Dict, Any, Set, Tuple, Iterator
+from datetime import date, datetime, timezone
 
-# Assuming models and schemas are defined
-from . import models, schemas # Adjust imports as per your project structure
+from .database import get_db_connection, open_db_connection
+from .item_store import ItemStore, COORD_DTYPE, COORD_FIELDS
+from .cache import TTLCache, ttl_cached
 
 logger = logging.getLogger(__name__)
 
-# --- Item Definition CRUD ---
-
-def get_item_definition(db: Session, item_definition_id: int) -> Optional[models.ItemDefinition]:
-    # *** Optimization: Add DB index on models.ItemDefinition.id ***
-    return db.query(models.ItemDefinition).filter(models.ItemDefinition.id == item_definition_id).first()
-
-def get_item_definitions(db: Session, skip: int = 0, limit: int = 100) -> List[models.ItemDefinition]:
-    return db.query(models.ItemDefinition).offset(skip).limit(limit).all()
-
-def create_item_definition(db: Session, item_def: schemas.ItemDefinitionCreate) -> models.ItemDefinition:
-    db_item_def = models.ItemDefinition(**item_def.model_dump())
-    db.add(db_item_def)
-    db.commit()
-    db.refresh(db_item_def)
-    logger.info(f"Created item definition: {db_item_def.name} (ID: {db_item_def.id})")
-    return db_item_def
-
-# --- Container CRUD ---
-
-def get_container(db: Session, container_id: int) -> Optional[models.Container]:
-     # *** Optimization: Add DB index on models.Container.id ***
-    return db.query(models.Container).filter(models.Container.id == container_id).first()
-
-def get_containers(db: Session, skip: int = 0, limit: int = 100) -> List[models.Container]:
-    # *** Optimization: Add DB index on models.Container.zone if filtering by zone often ***
-    return db.query(models.Container).offset(skip).limit(limit).all()
-
-def create_container(db: Session, container: schemas.ContainerCreate) -> models.Container:
-    db_container = models.Container(**container.model_dump())
-    db.add(db_container)
-    db.commit()
-    db.refresh(db_container)
-    logger.info(f"Created container: {db_container.name} (ID: {db_container.id})")
-    return db_container
-
-# --- Placed Item CRUD ---
-
-def get_placed_item(db: Session, placed_item_id: int) -> Optional[models.PlacedItem]:
-    # *** Optimization: Add DB index on models.PlacedItem.id ***
-    return db.query(models.PlacedItem).filter(models.PlacedItem.id == placed_item_id).first()
-
-def get_placed_items_by_container(db: Session, container_id: int) -> List[models.PlacedItem]:
-    # *** Optimization: Add DB index on models.PlacedItem.container_id ***
-    return db.query(models.PlacedItem).filter(models.PlacedItem.container_id == container_id).all()
-
-def get_all_placed_items(db: Session) -> List[models.PlacedItem]:
-    """Gets all placed items. Can be memory intensive for very large datasets."""
-    logger.warning("Fetching ALL placed items. Consider pagination or filtering for large datasets.")
-    return db.query(models.PlacedItem).all()
-
-def create_placed_item(db: Session, item: schemas.PlacedItemCreate, placement_details: Dict[str, Any]) -> models.PlacedItem:
-    """Creates a PlacedItem entry using details from the placement algorithm."""
-    # Merge item data with placement details
-    item_data = item.model_dump()
-    item_data.update({
-        "container_id": placement_details["container_id"],
-        "pos_x": placement_details["pos_x"],
-        "pos_y": placement_details["pos_y"],
-        "pos_z": placement_details["pos_z"],
-        "width": placement_details["placed_width"], # Store actual placed dimensions
-        "height": placement_details["placed_height"],
-        "depth": placement_details["placed_depth"],
-        "placement_timestamp": datetime.now(timezone.utc),
-        "currentUsage": 0 # Initialize usage count
-    })
-    db_item = models.PlacedItem(**item_data)
-    db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    logger.info(f"Placed item definition {item.item_definition_id} as PlacedItem ID {db_item.id} in container {db_item.container_id}")
-    # Log this action (consider moving logging logic here or calling a logging service)
-    # log_action(db, action_type="placement", item_id=db_item.id, details=f"Placed in C{db_item.container_id}")
-    return db_item
-
-def update_item_placement(db: Session, placed_item_id: int, move_details: Dict[str, Any]) -> Optional[models.PlacedItem]:
-    """Updates the position and container of an existing placed item."""
-    db_item = get_placed_item(db, placed_item_id)
-    if not db_item:
-        logger.error(f"Cannot update placement: PlacedItem ID {placed_item_id} not found.")
+# --- Item/Container CRUD (used by the import, placement and simulation APIs) ---
+
+ITEM_COLUMNS = ("itemId", "name", "width", "depth", "height", "mass", "priority", "expiryDate",
+                "usageLimit", "preferredZone", "containerId", "startW", "startD", "startH",
+                "endW", "endD", "endH")
+# Items are selected by these columns rather than *, so the SQLite-generated
+# expiry_epoch column stays out of the item dicts
+ITEM_SELECT = ", ".join(ITEM_COLUMNS)
+CONTAINER_COLUMNS = ("containerId", "zone", "width", "depth", "height")
+
+INSERT_BATCH_SIZE = 10_000
+SQLITE_MAX_PARAMS = 900 # Stay under SQLite's bound-parameter limit for IN (...) lookups
+
+# Read caches; every write path below clears the cache of the table it touches
+LOGS_CACHE = TTLCache(maxsize=1024, ttl=5.0)
+# itemId -> item dict for single-item reads, warmed a container at a time by prefetch_container_items
+ITEM_ROWS_CACHE = TTLCache(maxsize=100_000, ttl=30.0)
+# Containers prefetched recently; repeat prefetches within the TTL are skipped
+RECENT_PREFETCHES = TTLCache(maxsize=1024, ttl=5.0)
+# containerId -> read-only (N, 6) coords of its stored items; placements change far less often than they are read
+CONTAINER_COORDS_CACHE = TTLCache(maxsize=4096, ttl=30.0)
+
+
+def _to_row(obj: Any, columns: Tuple[str, ...]) -> tuple:
+    """Flattens a schema object into a tuple matching `columns` (missing fields become NULL)."""
+    row = []
+    for column in columns:
+        value = getattr(obj, column, None)
+        if isinstance(value, date):
+            value = value.isoformat()
+        row.append(value)
+    return tuple(row)
+
+
+def _existing_ids(conn: sqlite3.Connection, table: str, id_column: str, ids: List[str]) -> Set[str]:
+    """Returns which of `ids` are already stored, using chunked IN (...) lookups."""
+    existing = set()
+    for start in range(0, len(ids), SQLITE_MAX_PARAMS):
+        chunk = ids[start:start + SQLITE_MAX_PARAMS]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor = conn.execute(f"SELECT {id_column} FROM {table} WHERE {id_column} IN ({placeholders})", chunk)
+        existing.update(row[0] for row in cursor)
+    return existing
+
+
+@lru_cache(maxsize=None)
+def _insert_sql(table: str, columns: Tuple[str, ...]) -> str:
+    """INSERT statement for one table's columns; there are only a couple, so each is built once."""
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+def _insert_rows(table: str, columns: Tuple[str, ...], rows: List[tuple]) -> Tuple[int, List[str]]:
+    """
+    Inserts pre-built `rows` into `table` in one transaction with batched executemany calls.
+    The first column is the primary key; rows whose key already exists are skipped.
+    Returns (number inserted, list of duplicate IDs).
+    """
+    if not rows:
+        return 0, []
+    id_column = columns[0]
+    sql = _insert_sql(table, columns)
+
+    conn = get_db_connection()
+    with conn: # Single transaction -> single commit/fsync for the whole import
+        existing = _existing_ids(conn, table, id_column, [row[0] for row in rows])
+        duplicates = [row[0] for row in rows if row[0] in existing]
+        new_rows = [row for row in rows if row[0] not in existing]
+        for start in range(0, len(new_rows), INSERT_BATCH_SIZE):
+            conn.executemany(sql, new_rows[start:start + INSERT_BATCH_SIZE])
+    if table == "items" and new_rows:
+        _invalidate_cached_coords(new_rows)
+        RECENT_PREFETCHES.clear() # New rows may belong to a prefetched container
+    logger.info(f"Inserted {len(new_rows)} rows into {table} ({len(duplicates)} duplicates skipped)")
+    return len(new_rows), duplicates
+
+
+def _invalidate_cached_coords(item_rows: List[tuple]) -> None:
+    """
+    Drops the cached coordinate arrays of the containers that received `item_rows` (in
+    ITEM_COLUMNS order); the next get_container_coords reads them again. Each pop also bumps
+    the cache generation, so a read that started before the insert cannot store its stale array.
+    """
+    container_col = ITEM_COLUMNS.index("containerId")
+    for container_id in {row[container_col] for row in item_rows}:
+        if container_id is not None:
+            CONTAINER_COORDS_CACHE.pop(container_id)
+
+
+def _insert_bulk(table: str, columns: Tuple[str, ...], objects: List[Any]) -> Tuple[int, List[str]]:
+    """Inserts schema objects into `table` via _insert_rows. Returns (number inserted, list of duplicate IDs)."""
+    return _insert_rows(table, columns, [_to_row(obj, columns) for obj in objects])
+
+
+def create_items_bulk(items: List[Any]) -> Tuple[int, List[str]]:
+    """Inserts many items at once. Returns (number inserted, list of duplicate itemIds)."""
+    return _insert_bulk("items", ITEM_COLUMNS, items)
+
+
+def create_placed_items_bulk(items_by_id: Dict[str, Any], store: ItemStore) -> Tuple[int, List[str]]:
+    """
+    Inserts every item in `store`, taking its container and coordinates from the packed store
+    and the remaining columns from items_by_id[itemId]. No per-item model copy is made.
+    Returns (number inserted, list of duplicate itemIds).
+    """
+    store.validate()
+    base_columns = ITEM_COLUMNS[:-len(COORD_FIELDS) - 1]  # Everything before containerId
+    rows = [
+        _to_row(items_by_id[item_id], base_columns) + (container_id,) + tuple(coords)
+        for item_id, container_id, coords in zip(store.ids, store.container_ids, store.coords.tolist())
+    ]
+    return _insert_rows("items", ITEM_COLUMNS, rows)
+
+
+def get_existing_item_ids(item_ids: List[str]) -> Set[str]:
+    """Returns which of `item_ids` are already stored in the items table."""
+    return _existing_ids(get_db_connection(), "items", "itemId", item_ids)
+
+
+def create_containers_bulk(containers: List[Any]) -> Tuple[int, List[str]]:
+    """Inserts many containers at once. Returns (number inserted, list of duplicate containerIds)."""
+    return _insert_bulk("containers", CONTAINER_COLUMNS, containers)
+
+
+def create_item(item: Any) -> bool:
+    """Inserts a single item. Returns False if the itemId already exists."""
+    inserted, _ = create_items_bulk([item])
+    return inserted == 1
+
+
+def create_container(container: Any) -> bool:
+    """Inserts a single container. Returns False if the containerId already exists."""
+    inserted, _ = create_containers_bulk([container])
+    return inserted == 1
+
+
+def get_item_by_id(item_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns one stored item as a dict, or None (a primary-key lookup, not a scan).
+    Served from ITEM_ROWS_CACHE when the item was read or prefetched recently; treat it as read-only.
+    """
+    item = ITEM_ROWS_CACHE.get(item_id)
+    if item is not None:
+        return item
+    conn = get_db_connection()
+    row = conn.execute(f"SELECT {ITEM_SELECT} FROM items WHERE itemId = ?", (item_id,)).fetchone()
+    if row is None:
         return None
+    item = dict(row)
+    ITEM_ROWS_CACHE.set(item_id, item)
+    return item
+
+
+def prefetch_container_items(container_id: str) -> None:
+    """
+    Warms ITEM_ROWS_CACHE with every item of one container in a single query. Run after a
+    retrieval, when the next request is likely for a neighbour of the item just retrieved;
+    skipped if the same container was prefetched within RECENT_PREFETCHES.ttl seconds.
+    """
+    if RECENT_PREFETCHES.get(container_id) is not None:
+        return
+    RECENT_PREFETCHES.set(container_id, True)
+    for item in get_items_by_container(container_id):
+        ITEM_ROWS_CACHE.set(item["itemId"], item)
+    logger.debug(f"Prefetched container {container_id} (item cache hits {ITEM_ROWS_CACHE.hits}, misses {ITEM_ROWS_CACHE.misses})")
+
+
+# Columns update_item may set, and those whose change invalidates the per-container caches
+_UPDATABLE_ITEM_COLUMNS = frozenset(ITEM_COLUMNS[1:])
+_PLACEMENT_COLUMNS = frozenset(COORD_FIELDS + ("containerId",))
+
+
+@lru_cache(maxsize=256)
+def _update_item_sql(columns: Tuple[str, ...]) -> str:
+    """UPDATE statement for one set of item columns; few distinct sets recur, so each is built once."""
+    set_clause = ", ".join(f"{column} = ?" for column in columns)
+    return f"UPDATE items SET {set_clause} WHERE itemId = ?"
+
+
+def update_item(item_id: str, updates: Dict[str, Any]) -> bool:
+    """
+    Sets the given columns of one item in a single UPDATE. Returns False if the itemId is not stored.
+    Column names are checked against ITEM_COLUMNS, since they become part of the SQL text.
+    """
+    unknown = updates.keys() - _UPDATABLE_ITEM_COLUMNS
+    if unknown:
+        raise ValueError(f"Cannot update unknown item columns: {sorted(unknown)}")
+    if not updates:
+        return get_item_by_id(item_id) is not None
+    conn = get_db_connection()
+    # Sorted, so every order of the same keys shares one statement (here and in sqlite3's
+    # statement cache); the values are bound in the same sorted order
+    columns = tuple(sorted(updates))
+    with conn:
+        cursor = conn.execute(_update_item_sql(columns), (*(updates[column] for column in columns), item_id))
+    ITEM_ROWS_CACHE.pop(item_id)
+    if not _PLACEMENT_COLUMNS.isdisjoint(updates):
+        CONTAINER_COORDS_CACHE.clear()
+        RECENT_PREFETCHES.clear()
+    return cursor.rowcount == 1
 
-    # *** Use DB Transaction ***
+
+def get_items_by_container(container_id: str) -> List[Dict[str, Any]]:
+    """Returns the items stored in one container, via idx_items_container."""
+    conn = get_db_connection()
+    return [dict(row) for row in conn.execute(f"SELECT {ITEM_SELECT} FROM items WHERE containerId = ?", (container_id,))]
+
+
+def get_container_coords(container_ids: List[str]) -> Dict[str, np.ndarray]:
+    """
+    Returns, per containerId, a float (N, 6) array of its stored items' coordinates in
+    COORD_FIELDS order (startW, startD, startH, endW, endD, endH).
+
+    Arrays are kept in CONTAINER_COORDS_CACHE between requests (items inserts drop the entries
+    of the containers they touch, see _invalidate_cached_coords), so only containers not seen
+    recently are read. Those are fetched as plain tuples of the coordinate columns in one
+    chunked IN (...) query, so no per-row dict is ever built.
+    The returned arrays are shared and read-only.
+    """
+    coords_by_container: Dict[str, np.ndarray] = {}
+    missing = []
+    for container_id in container_ids:
+        coords = CONTAINER_COORDS_CACHE.get(container_id)
+        if coords is None:
+            missing.append(container_id)
+        else:
+            coords_by_container[container_id] = coords
+    if not missing:
+        return coords_by_container
+
+    # Read before the query: an insert landing meanwhile bumps it, and the arrays read here,
+    # which may predate that insert, are then returned but not cached
+    generation = CONTAINER_COORDS_CACHE.generation
+    columns = ", ".join(COORD_FIELDS)
+    grouped: Dict[str, List[tuple]] = {container_id: [] for container_id in missing}
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.row_factory = None # Plain tuples instead of sqlite3.Row
+    for start in range(0, len(missing), SQLITE_MAX_PARAMS):
+        chunk = missing[start:start + SQLITE_MAX_PARAMS]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(f"SELECT containerId, {columns} FROM items WHERE containerId IN ({placeholders})", chunk)
+        for container_id, *coords in cursor:
+            grouped[container_id].append(coords)
+    for container_id, rows in grouped.items():
+        coords = np.array(rows, dtype=COORD_DTYPE).reshape(-1, len(COORD_FIELDS))
+        coords.setflags(write=False) # Shared between requests through the cache
+        CONTAINER_COORDS_CACHE.set(container_id, coords, generation)
+        coords_by_container[container_id] = coords
+    return {container_id: coords_by_container[container_id] for container_id in container_ids}
+
+
+def _iter_row_batches(sql: str, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yields the rows of `sql` in batches of at most `batch_size` dicts.
+    SQLite steps the cursor lazily, so only one batch is materialized at a time.
+    """
+    # Consumers such as StreamingResponse may resume the generator on different worker threads,
+    # so it gets a dedicated connection instead of the calling thread's shared one
+    conn = open_db_connection(check_same_thread=False)
     try:
-        original_container = db_item.container_id
-        db_item.container_id = move_details["container_id"]
-        db_item.pos_x = move_details["pos_x"]
-        db_item.pos_y = move_details["pos_y"]
-        db_item.pos_z = move_details["pos_z"]
-        # Update width/height/depth if rotation changed (assuming move_details includes these)
-        if "placed_width" in move_details: db_item.width = move_details["placed_width"]
-        if "placed_height" in move_details: db_item.height = move_details["placed_height"]
-        if "placed_depth" in move_details: db_item.depth = move_details["placed_depth"]
-
-        db.add(db_item)
-        db.commit()
-        db.refresh(db_item)
-        logger.info(f"Updated placement for PlacedItem ID {placed_item_id}. Moved to C{db_item.container_id} at ({db_item.pos_x}, {db_item.pos_y}, {db_item.pos_z})")
-        # Log this action
-        # log_action(db, action_type="move", item_id=db_item.id, details=f"Moved from C{original_container} to C{db_item.container_id}")
-        return db_item
-    except IntegrityError as e:
-        db.rollback()
-        logger.error(f"Database integrity error updating placement for item {placed_item_id}: {e}")
-        return None
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error updating placement for item {placed_item_id}: {e}")
-        return None
+        cursor = conn.execute(sql)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [dict(row) for row in rows]
+    finally:
+        conn.close()
 
 
-def increment_item_usage(db: Session, placed_item_id: int) -> Optional[models.PlacedItem]:
-     """Increments the usage count for an item."""
-     # *** Use DB Transaction ***
-     db_item = get_placed_item(db, placed_item_id)
-     if not db_item:
-         logger.error(f"Cannot increment usage: PlacedItem ID {placed_item_id} not found.")
-         return None
-
-     try:
-         if db_item.currentUsage is None:
-             db_item.currentUsage = 0
-         db_item.currentUsage += 1
-         db.add(db_item)
-         db.commit()
-         db.refresh(db_item)
-         logger.info(f"Incremented usage for PlacedItem ID {placed_item_id} to {db_item.currentUsage}")
-         # Log this action
-         # log_action(db, action_type="usage_increment", item_id=db_item.id, details=f"Usage incremented to {db_item.currentUsage}")
-         return db_item
-     except Exception as e:
-         db.rollback()
-         logger.error(f"Error incrementing usage for item {placed_item_id}: {e}")
-         return None
-
-
-def remove_placed_item(db: Session, placed_item_id: int) -> bool:
-    """Removes a placed item from the database (e.g., after retrieval or disposal)."""
-     # *** Use DB Transaction ***
-    db_item = get_placed_item(db, placed_item_id)
-    if db_item:
-        try:
-            item_def_id = db_item.item_definition_id
-            container_id = db_item.container_id
-            db.delete(db_item)
-            db.commit()
-            logger.info(f"Removed PlacedItem ID {placed_item_id} (Def ID: {item_def_id}) from container {container_id}")
-             # Log this action
-             # log_action(db, action_type="removal", item_id=placed_item_id, details=f"Item removed from system.")
-            return True
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Error removing PlacedItem ID {placed_item_id}: {e}")
-            return False
-    else:
-        logger.warning(f"Attempted to remove non-existent PlacedItem ID {placed_item_id}")
-        return False
+def get_all_items_iter(batch_size: int = 10_000) -> Iterator[List[Dict[str, Any]]]:
+    """Yields stored items in batches of at most `batch_size` dicts (see _iter_row_batches)."""
+    return _iter_row_batches(f"SELECT {ITEM_SELECT} FROM items", batch_size)
 
-# --- Log CRUD ---
 
-def create_log_entry(db: Session, log_entry: schemas.LogEntryCreate) -> models.LogEntry:
-    db_log = models.LogEntry(
-        timestamp=datetime.now(timezone.utc), # Ensure timestamp is set on creation
-        action_type=log_entry.action_type,
-        item_id=log_entry.item_id,
-        container_id=log_entry.container_id,
-        details=log_entry.details
+def get_all_containers_iter(batch_size: int = 10_000) -> Iterator[List[Dict[str, Any]]]:
+    """Yields stored containers in batches of at most `batch_size` dicts (see _iter_row_batches)."""
+    return _iter_row_batches(f"SELECT {', '.join(CONTAINER_COLUMNS)} FROM containers", batch_size)
+
+
+def day_epoch(day: date) -> int:
+    """Unix time of midnight UTC on `day`, the value expiry_epoch holds for a bare expiry date."""
+    return calendar.timegm(day.timetuple())
+
+
+def get_items_expiring(start: date, end: date) -> List[Tuple[str, str]]:
+    """
+    Returns (itemId, name) of every item whose expiry date falls in [start, end), i.e. items that
+    are not waste on `start` but are by `end`. An integer range scan on idx_items_expiry; no
+    expiryDate text is parsed or compared.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.row_factory = None # Plain tuples instead of sqlite3.Row
+    cursor.execute(
+        "SELECT itemId, name FROM items WHERE expiry_epoch >= ? AND expiry_epoch < ? ORDER BY expiry_epoch",
+        (day_epoch(start), day_epoch(end))
     )
-    db.add(db_log)
-    db.commit()
-    db.refresh(db_log)
-    # Avoid logging the log creation itself to prevent infinite loops if logging is broad
-    # logger.debug(f"Created log entry: {db_log.id} - {db_log.action_type}")
-    return db_log
-
-def get_log_entries(db: Session, skip: int = 0, limit: int = 100) -> List[models.LogEntry]:
-    # *** Optimization: Add DB index on models.LogEntry.timestamp (and potentially action_type/item_id if filtering) ***
-    return db.query(models.LogEntry).order_by(models.LogEntry.timestamp.desc()).offset(skip).limit(limit).all()
\ No newline at end of file
+    return cursor.fetchall()
+
+
+def simulate_day() -> List[Tuple[str, str, int]]:
+    """
+    Uses up one use of every item that still has uses left, in a single UPDATE.
+    Returns (itemId, name, new usageLimit) for each item that was used.
+    """
+    conn = get_db_connection()
+    with conn:
+        cursor = conn.execute(
+            "UPDATE items SET usageLimit = MAX(usageLimit - 1, 0) WHERE usageLimit > 0 "
+            "RETURNING itemId, name, usageLimit"
+        )
+        used = [tuple(row) for row in cursor.fetchall()]
+    ITEM_ROWS_CACHE.clear()
+    return used
+
+# --- Log CRUD ---
+
+LOG_BUCKET_SECONDS = 3600 # logs.log_bucket = unix timestamp // LOG_BUCKET_SECONDS
+# create_log buffers entries; they are written in one transaction once this many are pending,
+# or by the periodic flush_logs started with the app (see main.py), whichever comes first
+LOG_FLUSH_THRESHOLD = 500
+LOG_FLUSH_INTERVAL = 0.05 # seconds
+
+_pending_logs: List[tuple] = []
+_LOG_BUFFER_LOCK = threading.Lock()
+
+
+def _epoch(ts: datetime) -> float:
+    """Unix time of `ts` (naive datetimes are treated as UTC)."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def _log_bucket(epoch: float) -> int:
+    """Maps a unix time to its hour bucket."""
+    return int(epoch) // LOG_BUCKET_SECONDS
+
+
+def queue_log(log: Any) -> bool:
+    """
+    Queues a log entry with its unix time and timestamp bucket; `details` is stored as JSON text.
+    The timestamp is parsed once by the schema, so nothing here re-parses strings.
+    Only a list append (no I/O), so async handlers may call it on the event loop. Returns True
+    once LOG_FLUSH_THRESHOLD entries are pending: the caller should then run flush_logs.
+    """
+    epoch = _epoch(log.timestamp)
+    row = (log.timestamp.isoformat(), log.userId, log.actionType, log.itemId,
+           orjson.dumps(log.details).decode(), _log_bucket(epoch), epoch)
+    with _LOG_BUFFER_LOCK:
+        _pending_logs.append(row)
+        full = len(_pending_logs) >= LOG_FLUSH_THRESHOLD
+    LOGS_CACHE.clear()
+    return full
+
+
+def create_log(log: Any) -> None:
+    """
+    Stores a log entry: queued by queue_log and committed in batches by flush_logs (one
+    transaction and WAL sync per batch, not per entry), here once the buffer is full.
+    get_logs flushes first, so pending entries are never missing from a read.
+    """
+    if queue_log(log):
+        flush_logs()
+
+
+def has_pending_logs() -> bool:
+    """Whether create_log has queued entries that flush_logs has not written yet."""
+    return bool(_pending_logs)
+
+
+def flush_logs() -> int:
+    """Writes every pending log entry in one transaction and returns how many were written."""
+    global _pending_logs
+    with _LOG_BUFFER_LOCK:
+        if not _pending_logs:
+            return 0
+        rows, _pending_logs = _pending_logs, []
+    conn = get_db_connection()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO logs (timestamp, userId, actionType, itemId, details, log_bucket, ts_epoch) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+    except sqlite3.Error:
+        # Rolled back: requeue the batch ahead of anything queued meanwhile, for the next flush
+        with _LOG_BUFFER_LOCK:
+            _pending_logs[:0] = rows
+        raise
+    LOGS_CACHE.clear()
+    return len(rows)
+
+
+@ttl_cached(LOGS_CACHE)
+def get_logs(
+    startDate: Optional[datetime] = None,
+    endDate: Optional[datetime] = None,
+    itemId: Optional[str] = None,
+    userId: Optional[str] = None,
+    actionType: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Returns logs matching every given filter, oldest first.
+    All predicates are evaluated by SQLite so the logs indexes can be used instead of a Python scan.
+    Identical queries within LOGS_CACHE.ttl seconds are served from memory until the next create_log.
+
+    Date ranges are resolved through log_bucket: the index narrows the scan to the buckets
+    overlapping [startDate, endDate], and the exact comparison (on the numeric ts_epoch, so it
+    does not depend on how the timestamp text was formatted) is only needed for rows in the
+    two boundary buckets.
+    """
+    clauses = []
+    params: List[Any] = []
+    if startDate is not None:
+        start = _epoch(startDate)
+        start_bucket = _log_bucket(start)
+        clauses.append("log_bucket >= ? AND (log_bucket > ? OR ts_epoch >= ?)")
+        params.extend((start_bucket, start_bucket, start))
+    if endDate is not None:
+        end = _epoch(endDate)
+        end_bucket = _log_bucket(end)
+        clauses.append("log_bucket <= ? AND (log_bucket < ? OR ts_epoch <= ?)")
+        params.extend((end_bucket, end_bucket, end))
+    for column, value in (("actionType", actionType), ("itemId", itemId), ("userId", userId)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    flush_logs() # Queued entries are part of the answer
+    conn = get_db_connection()
+    cursor = conn.execute(f"SELECT timestamp, userId, actionType, itemId, details FROM logs{where} ORDER BY ts_epoch", params)
+    return [dict(row) for row in cursor]
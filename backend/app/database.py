@@ -1,9 +1,58 @@
+import logging
 import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = "cargo.db"
+
+# Per-connection settings: WAL (set persistently by init_db) lets readers run alongside a writer,
+# and NORMAL sync is durable under WAL while skipping an fsync per commit
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+# Bump whenever init_db gains a table, column, index or migration; stored as PRAGMA user_version
+SCHEMA_VERSION = 1
+
+_local = threading.local()
+
+def open_db_connection(check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a new connection whose rows can be read like dicts (row["itemId"]). The caller closes it."""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def get_db_connection() -> sqlite3.Connection:
+    """
+    The calling thread's connection, opened on first use and then reused, so requests do not
+    pay for connect() and schema parsing each time. Do not close it; use `with conn:` for writes.
+    One connection per thread (instead of one shared) keeps sqlite3 objects on their own thread.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = open_db_connection()
+    return conn
 
 def init_db():
+    """
+    Creates or migrates the schema. A database already at SCHEMA_VERSION is left untouched, so
+    startup on an initialized database costs one PRAGMA read instead of the DDL and backfills.
+    """
+    # The calling thread's tuned connection, so the migrations and backfills below also run with
+    # NORMAL sync and in-memory temp storage, and later queries on this thread reuse it
+    conn = get_db_connection()
     try:
-        conn = sqlite3.connect("cargo.db")
         cursor = conn.cursor()
+        if cursor.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        # Persistent for the database file: readers no longer block on (or block) a writer
+        cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute('''CREATE TABLE IF NOT EXISTS items (
             itemId TEXT PRIMARY KEY, name TEXT, width REAL, depth REAL, height REAL,
             mass REAL, priority INTEGER, expiryDate TEXT, usageLimit INTEGER,
@@ -12,10 +61,43 @@ def init_db():
         cursor.execute('''CREATE TABLE IF NOT EXISTS containers (
             containerId TEXT PRIMARY KEY, zone TEXT, width REAL, depth REAL, height REAL)''')
         cursor.execute('''CREATE TABLE IF NOT EXISTS logs (
-            timestamp TEXT, userId TEXT, actionType TEXT, itemId TEXT, details TEXT)''')
+            timestamp TEXT, userId TEXT, actionType TEXT, itemId TEXT, details TEXT,
+            log_bucket INTEGER, ts_epoch REAL)''')
+        # expiryDate stays ISO text (what the API reads and writes); expiry_epoch is the same date as
+        # integer UTC seconds, generated by SQLite so every insert and update keeps it in step.
+        # Added in place because databases created before it lack the column
+        item_columns = {row[1] for row in cursor.execute("PRAGMA table_xinfo(items)")}
+        if "expiry_epoch" not in item_columns:
+            cursor.execute('''ALTER TABLE items ADD COLUMN expiry_epoch INTEGER
+                GENERATED ALWAYS AS (CAST(strftime('%s', expiryDate) AS INTEGER)) VIRTUAL''')
+        # Per-container contents (placement, retrieval) and name lookups (search)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_container ON items (containerId)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_name ON items (name)")
+        # Expiry range scans (crud.get_items_expiring) on the integer expiry_epoch
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_items_expiry ON items (expiry_epoch, usageLimit)")
+        # Databases created before log bucketing / epoch timestamps need the columns added in place
+        log_columns = {row[1] for row in cursor.execute("PRAGMA table_info(logs)")}
+        if "log_bucket" not in log_columns:
+            cursor.execute("ALTER TABLE logs ADD COLUMN log_bucket INTEGER")
+        if "ts_epoch" not in log_columns:
+            cursor.execute("ALTER TABLE logs ADD COLUMN ts_epoch REAL")
+        # julianday() understands the ISO text already stored, so old rows are backfilled in SQL
+        cursor.execute('''UPDATE logs SET ts_epoch = ROUND((julianday(timestamp) - 2440587.5) * 86400.0, 3)
+            WHERE ts_epoch IS NULL''')
+        cursor.execute('''UPDATE logs SET log_bucket = CAST(ts_epoch AS INTEGER) / 3600
+            WHERE log_bucket IS NULL AND ts_epoch IS NOT NULL''')
+        # Covers the /api/logs filters: numeric range scan on the epoch time, then equality on the rest
+        cursor.execute('''CREATE INDEX IF NOT EXISTS idx_logs_epoch
+            ON logs (ts_epoch, actionType, itemId, userId)''')
+        # Hour buckets let date-range queries skip whole buckets without comparing timestamps
+        cursor.execute('''CREATE INDEX IF NOT EXISTS idx_logs_bucket
+            ON logs (log_bucket, actionType, itemId)''')
+        # Per-item / per-user history without a date range; ts_epoch second so ORDER BY needs no sort
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_item ON logs (itemId, ts_epoch)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_user ON logs (userId, ts_epoch)")
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         conn.commit()
-    except sqlite3.Error as e:
-        print(f"Database initialization failed: {e}")
-        raise
-    finally:
-        conn.close()
\ No newline at end of file
+    except sqlite3.Error:
+        conn.rollback() # The connection stays in use; leave no half-applied migration open
+        logger.exception("Database initialization failed")
+        raise
\ No newline at end of file
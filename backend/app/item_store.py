@@ -0,0 +1,75 @@
+"""
+Packed in-memory store for item coordinates.
+
+The six coordinates of an item are always read and written together, so they are kept as one
+row of a single (N, 6) NumPy array instead of six attributes on one Pydantic model per item.
+Pydantic models are only used to validate requests; the store is what the batch paths carry.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Column order of a coords row; matches the coordinate columns of the items table
+COORD_FIELDS = ("startW", "startD", "startH", "endW", "endD", "endH")
+# Element type of every coordinate array. float32 would halve the bytes scanned, but it rounds
+# away gaps and overlaps smaller than ~1e-7 of the coordinate (whole units past 2**24), and
+# candidate corners computed as start + size would no longer match the stored far faces, so
+# touching boxes could read as overlapping. Coordinates stay float64.
+COORD_DTYPE = np.float64
+
+
+class ItemStore:
+    """
+    Item IDs, their container and their packed coordinates.
+
+    Row i of `coords` holds (startW, startD, startH, endW, endD, endH) of ids[i], and
+    id_to_idx maps an itemId back to its row. Capacity doubles when full, so append is
+    amortized O(1). Rows are COORD_DTYPE, so touching faces compare exactly equal.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.ids: List[str] = []
+        self.container_ids: List[Optional[str]] = []
+        self.id_to_idx: Dict[str, int] = {}
+        self._coords = np.empty((capacity, len(COORD_FIELDS)), dtype=COORD_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.id_to_idx
+
+    @property
+    def coords(self) -> np.ndarray:
+        """View (no copy) of the rows in use."""
+        return self._coords[:len(self.ids)]
+
+    def append(self, item_id: str, container_id: Optional[str], coords: Sequence[float]) -> int:
+        """Adds an item and returns its row index. Raises ValueError if the itemId is already stored."""
+        if item_id in self.id_to_idx:
+            raise ValueError(f"Item {item_id} is already in the store")
+        idx = len(self.ids)
+        if idx == len(self._coords):
+            grown = np.empty((2 * len(self._coords), len(COORD_FIELDS)), dtype=COORD_DTYPE)
+            grown[:idx] = self._coords[:idx]
+            self._coords = grown
+        self._coords[idx] = coords
+        self.ids.append(item_id)
+        self.container_ids.append(container_id)
+        self.id_to_idx[item_id] = idx
+        return idx
+
+    def update(self, item_id: str, coords: Sequence[float], container_id: Optional[str] = None) -> None:
+        """Overwrites an item's coordinates in place (and its container, if given)."""
+        idx = self.id_to_idx[item_id]
+        self._coords[idx] = coords
+        if container_id is not None:
+            self.container_ids[idx] = container_id
+
+    def validate(self) -> None:
+        """Vectorized range check over every row: coordinates are non-negative and start <= end."""
+        coords = self.coords
+        if not np.all(coords >= 0):
+            raise ValueError("Item coordinates must be non-negative")
+        if not np.all(coords[:, :3] <= coords[:, 3:]):
+            raise ValueError("Item start coordinates must not exceed end coordinates")
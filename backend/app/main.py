@@ -1,16 +1,39 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from .crud import LOG_FLUSH_INTERVAL, flush_logs, has_pending_logs
 from .database import init_db
-import sqlite3
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-def check_db_initialized():
-    conn = sqlite3.connect("cargo.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='items'")
-    exists = cursor.fetchone()
-    conn.close()
-    return exists is not None
+async def _flush_logs_periodically():
+    """
+    Commits the entries buffered by crud.create_log every LOG_FLUSH_INTERVAL seconds.
+    Idle ticks skip the executor hop; a failed flush is logged (its entries stay queued for
+    the next tick) instead of ending the task.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(LOG_FLUSH_INTERVAL)
+        if not has_pending_logs():
+            continue
+        try:
+            await loop.run_in_executor(None, flush_logs)
+        except Exception:
+            logger.exception("Periodic log flush failed")
 
-if not check_db_initialized():
-    init_db()
\ No newline at end of file
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker before it serves requests, not as an import side effect; a database
+    # already at the current schema version is detected from one PRAGMA and left as is
+    init_db()
+    log_flusher = asyncio.create_task(_flush_logs_periodically())
+    try:
+        yield
+    finally:
+        log_flusher.cancel()
+        flush_logs()
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
@@ -1,47 +1,79 @@
 # backend/app/schemas.py
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Tuple
+import base64
+from enum import Enum
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, PlainSerializer
+from typing import Annotated, List, Literal, Optional, Dict, Any, Tuple, Union
 from datetime import datetime, date
 
-# --- Configuration for ORM Mode ---
+# Models of the SQLAlchemy side (definitions, placed items, waste). The transport models of the
+# SQLite-backed routers (Item, Container, Log, PlacementRequest/Response) and the bulk
+# import/export (CSV and NDJSON, in app/api/import_export.py) are defined once, in
+# app/api/schemas.py, and are not repeated here.
+
+# --- Model Configuration ---
+# defer_build: a model's validator/serializer is built on its first use instead of at import,
+# so models only rare endpoints touch (simulation, bulk import/export) cost nothing at startup.
+# Subclasses inherit the setting from their base.
+deferred_config = ConfigDict(defer_build=True)
 # Used in schemas that read data directly from SQLAlchemy models
-orm_config = {"from_attributes": True}
+orm_config = ConfigDict(from_attributes=True, defer_build=True)
+
+# Range checks for client input; models only built from trusted DB rows use bare floats
+NonNegativeFloat = Annotated[float, Field(ge=0)]
+PositiveFloat = Annotated[float, Field(gt=0)]
+# Bitset carried as standard base64 text in JSON (both ways) and as raw bytes in Python
+BlockingMask = Annotated[
+    bytes,
+    BeforeValidator(lambda v: base64.b64decode(v, validate=True) if isinstance(v, str) else v),
+    PlainSerializer(lambda v: base64.b64encode(v).decode('ascii'), return_type=str, when_used='json'),
+]
+# Priority 1-10 (lower number means higher priority), checked as membership of a fixed set
+Priority = Literal[1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+
+
+class ActionType(str, Enum):
+    """Actions logged through LogCreate; the values are what /api/logs reports as actionType."""
+    IDENTIFY_WASTE = "Identify Waste"
+    PLAN_WASTE_RETURN = "Plan Waste Return"
 
 
 # --- Item Definition Schemas ---
 
 class ItemBase(BaseModel):
     """Base schema for item properties."""
+    model_config = deferred_config
+
     name: str
     width: float = Field(..., gt=0, description="Width of the item (along X-axis)")
     depth: float = Field(..., gt=0, description="Depth of the item (along Y-axis)")
     height: float = Field(..., gt=0, description="Height of the item (along Z-axis)")
     mass: float = Field(..., gt=0, description="Mass of the item")
-    priority: int = Field(..., ge=1, le=10, description="Priority (1-10, lower number means higher priority)")
+    priority: Priority = Field(..., description="Priority (1-10, lower number means higher priority)")
     expiryDate: Optional[date] = Field(None, description="Expiry date (YYYY-MM-DD)")
     usageLimit: Optional[int] = Field(None, gt=0, description="Usage limit (e.g., number of times it can be retrieved)")
     preferredZone: Optional[str] = Field(None, description="Preferred storage zone")
 
 
-class ItemCreate(ItemBase):
+class ItemDefinitionCreate(ItemBase):
     """Schema for creating a new item definition (template)."""
     itemId: str = Field(..., description="Unique ID for this item type")
 
 
-class Item(ItemBase):
+class ItemDefinition(ItemBase):
     """Schema for reading an item definition (represents the DB model)."""
-    itemId: str = Field(..., description="Unique ID for this item type")
+    # Allow creating this schema from a DB model object
+    model_config = orm_config
 
-    class Config(BaseModel.Config):
-        # Allow creating this schema from a DB model object
-        from_attributes = True
+    itemId: str = Field(..., description="Unique ID for this item type")
 
 
 # --- Container Schemas ---
 
 class ContainerBase(BaseModel):
     """Base schema for container properties."""
+    model_config = deferred_config
+
     zone: str = Field(..., description="Storage zone the container belongs to")
     width: float = Field(..., gt=0, description="Internal width of the container (X-axis)")
     depth: float = Field(..., gt=0, description="Internal depth of the container (Y-axis)")
@@ -53,77 +85,82 @@ class ContainerCreate(ContainerBase):
     containerId: str = Field(..., description="Unique ID for the container")
 
 
-class Container(ContainerBase):
-    """Schema for reading a container (represents the DB model)."""
-    containerId: str = Field(..., description="Unique ID for the container")
-
-    class Config(BaseModel.Config):
-        from_attributes = True
-
-
 # --- Placed Item Schemas ---
 
 class PlacedItemBase(BaseModel):
-    """Base schema for placement details."""
-    startW: float = Field(..., ge=0, description="Starting coordinate along the container's width (X-axis)")
-    startD: float = Field(..., ge=0, description="Starting coordinate along the container's depth (Y-axis, front is 0)")
-    startH: float = Field(..., ge=0, description="Starting coordinate along the container's height (Z-axis, bottom is 0)")
+    """Base schema for placement details, as read back from the DB (trusted, so unconstrained)."""
+    model_config = deferred_config
+
+    # Starting corner along the container's width (X-axis), depth (Y-axis, front is 0)
+    # and height (Z-axis, bottom is 0)
+    startW: float
+    startD: float
+    startH: float
     # Dimensions of the item *as placed* (accounts for rotation)
-    width: float = Field(..., gt=0, description="Width of the item as placed")
-    depth: float = Field(..., gt=0, description="Depth of the item as placed")
-    height: float = Field(..., gt=0, description="Height of the item as placed")
+    width: float
+    depth: float
+    height: float
 
 
 class PlacedItemCreate(PlacedItemBase):
-    """Schema used as input when placing an item in a container."""
+    """Schema used as input when placing an item in a container; client input is range-checked."""
+    startW: NonNegativeFloat
+    startD: NonNegativeFloat
+    startH: NonNegativeFloat
+    width: PositiveFloat
+    depth: PositiveFloat
+    height: PositiveFloat
     itemId: str = Field(..., description="ID of the item definition being placed")
     containerId: str = Field(..., description="ID of the container where the item is placed")
 
 
 class PlacedItem(PlacedItemBase):
     """Schema for reading a placed item (represents the DB model)."""
+    model_config = orm_config
+
     itemId: str
     name: str # Populated from ItemDefinition in CRUD
     containerId: str
     priority: int # Populated from ItemDefinition in CRUD
-
-    class Config(BaseModel.Config):
-        from_attributes = True
-
-
-# --- Placement API Schemas ---
-
-class PlacementRequest(BaseModel):
-    """Request body for the placement API endpoint."""
-    itemId: str = Field(..., description="ID of the item definition to place")
-    userId: str = Field(..., description="ID of the user performing the action")
-
-
-class PlacementResponse(BaseModel):
-    """Response body for a successful placement."""
-    message: str = "Placement successful"
-    placed_item: PlacedItem
+    # Far corner, materialized when the placement is written (start + placed size), so readers
+    # compare stored coordinates instead of re-adding the size in every overlap test
+    endW: float
+    endD: float
+    endH: float
 
 
 # --- Search/Retrieval Schemas ---
 
 class RetrievalInstruction(BaseModel):
-    """Instruction step for retrieving an item."""
-    move: str = Field(..., description="Item ID to move")
-    from_container: str = Field(..., alias="from", description="Container ID the item is currently in")
+    """Instruction step for retrieving an item: move item `move` out of container `from`."""
+    model_config = deferred_config
+
+    move: str
+    from_container: str = Field(..., alias="from")
 
 
 class SearchResultItem(BaseModel):
-    """Represents a single item found during search, including retrieval info."""
-    item: PlacedItem = Field(..., description="Details of the placed item found")
-    retrieval_steps: int = Field(..., description="Number of other items that need to be moved to retrieve this item")
-    blocking_items: List[str] = Field(..., description="List of item IDs that are directly blocking retrieval")
-    retrieval_instructions: List[RetrievalInstruction] = Field(..., description="Step-by-step moves required")
-    score: Optional[float] = Field(None, description="Calculated score for retrieval priority (lower is better)")
+    """
+    Represents a single item found during search, including retrieval info.
+    Serialize with by_alias=True, so retrieval instructions keep their "from" key.
+    """
+    model_config = deferred_config
+
+    item: PlacedItem
+    retrieval_steps: int # Number of other items that need to be moved to retrieve this item
+    # Items directly blocking retrieval, as a little-endian bitset over SearchResponse.item_index:
+    # bit i (blocking_mask[i >> 3] & (1 << (i & 7))) is set when item_index[i] is a blocker
+    blocking_mask: BlockingMask
+    retrieval_instructions: List[RetrievalInstruction] # Step-by-step moves required
+    score: Optional[float] = None # Retrieval priority score (lower is better)
 
 
 class SearchResponse(BaseModel):
-    """Overall response for the search API."""
+    """Overall response for the search API (serialize with by_alias=True)."""
+    model_config = deferred_config
+
+    # Item IDs every result's blocking_mask indexes into, sent once per response
+    item_index: List[str]
     results: List[SearchResultItem]
 
 
@@ -131,25 +168,18 @@ class SearchResponse(BaseModel):
 
 class LogBase(BaseModel):
     """Base schema for log entries."""
+    model_config = deferred_config
+
     userId: str = Field(..., description="ID of the user performing the action")
-    action: str = Field(..., description="Description of the action performed")
+    action: ActionType = Field(..., description="The action performed")
     details: Optional[str] = Field(None, description="Additional details about the action")
 
 
 class LogCreate(LogBase):
-    """Schema for creating a new log entry."""
+    """Schema for creating a new log entry (stored through crud.create_log as an api.schemas.Log)."""
     pass
 
 
-class Log(LogBase):
-    """Schema for reading a log entry (represents the DB model)."""
-    id: int = Field(..., description="Unique ID of the log entry")
-    timestamp: datetime = Field(..., description="Timestamp when the action occurred")
-
-    class Config(BaseModel.Config):
-        from_attributes = True
-
-
 # --- Waste Management Schemas ---
 
 class WasteItem(PlacedItem):
@@ -160,6 +190,8 @@ class WasteItem(PlacedItem):
 
 class WastePlanRequest(BaseModel):
     """Input for planning waste removal."""
+    model_config = deferred_config
+
     undocking_container_id: str = Field(..., description="Target container ID for waste items")
     max_weight: float = Field(..., gt=0, description="Maximum total weight allowed in the undocking container")
     userId: str = Field(..., description="ID of the user performing the action")
@@ -167,6 +199,8 @@ class WastePlanRequest(BaseModel):
 
 class WastePlanResponseItem(BaseModel):
     """Item included in the waste removal plan."""
+    model_config = deferred_config
+
     itemId: str
     name: str
     from_containerId: str
@@ -175,46 +209,59 @@ class WastePlanResponseItem(BaseModel):
 
 class WastePlanResponse(BaseModel):
     """Output of the waste removal plan."""
+    model_config = deferred_config
+
     items_to_move: List[WastePlanResponseItem]
     total_items: int
     total_weight: float
 
 
-# --- Import/Export Schemas ---
+# --- Simulation Schemas ---
+# These are basic examples, adjust based on your simulation logic
+
+class ItemExpiredDetails(BaseModel):
+    """Details of an ITEM_EXPIRED event."""
+    model_config = deferred_config
+
+    itemId: str
+    expiredAt: datetime
+
 
-class BulkImportRequest(BaseModel):
-    """Request for bulk importing items and containers."""
-    items: List[ItemCreate] = Field(default_factory=list)
-    containers: List[ContainerCreate] = Field(default_factory=list)
-    userId: str = Field(..., description="ID of the user performing the import")
+class UsageLimitDetails(BaseModel):
+    """Details of a USAGE_LIMIT_REACHED event."""
+    model_config = deferred_config
 
+    itemId: str
+    uses: int
 
-class BulkImportResponse(BaseModel):
-    """Response after bulk import."""
-    items_created: int
-    containers_created: int
-    errors: List[str] = Field(default_factory=list)
 
+class ItemExpiredEvent(BaseModel):
+    """An item expired during simulation."""
+    model_config = deferred_config
 
-class ExportDataResponse(BaseModel):
-    """Response containing exported data."""
-    items: List[Item]
-    containers: List[Container]
-    placed_items: List[PlacedItem]
+    timestamp: float # Simulation time
+    event_type: Literal["ITEM_EXPIRED"]
+    details: ItemExpiredDetails
 
 
-# --- Simulation Schemas ---
-# These are basic examples, adjust based on your simulation logic
+class UsageLimitReachedEvent(BaseModel):
+    """An item used up its last use during simulation."""
+    model_config = deferred_config
 
-class SimulationEvent(BaseModel):
-    """Represents an event that occurred during simulation."""
     timestamp: float # Simulation time
-    event_type: str # e.g., "ITEM_EXPIRED", "USAGE_LIMIT_REACHED"
-    details: Dict[str, Any]
+    event_type: Literal["USAGE_LIMIT_REACHED"]
+    details: UsageLimitDetails
+
+
+# Represents an event that occurred during simulation. Tagged by event_type, so validation picks
+# the event model with one lookup on the tag instead of trying each one (or a generic dict)
+SimulationEvent = Annotated[Union[ItemExpiredEvent, UsageLimitReachedEvent], Field(discriminator="event_type")]
 
 
 class SimulationRequest(BaseModel):
     """Input parameters for running a time simulation."""
+    model_config = deferred_config
+
     duration_days: float = Field(..., gt=0, description="Number of days to simulate")
     # Add other parameters like event frequency, specific scenarios etc.
     userId: str = Field(..., description="ID of the user initiating the simulation")
@@ -222,6 +269,8 @@ class SimulationRequest(BaseModel):
 
 class SimulationResult(BaseModel):
     """Output of the time simulation."""
+    model_config = deferred_config
+
     final_sim_time_days: float
     events_occurred: List[SimulationEvent]
     # Include final state summaries if needed (e.g., number of expired items)
@@ -231,4 +280,6 @@ class SimulationResult(BaseModel):
 
 class MessageResponse(BaseModel):
     """A generic response model for simple status messages."""
+    model_config = deferred_config
+
     message: str
\ No newline at end of file
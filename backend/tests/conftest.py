@@ -0,0 +1,26 @@
+# Makes the `app` package importable when pytest is run from backend/ or the repository root
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh SQLite database in tmp_path, with the in-process caches and the log buffer emptied."""
+    from app import crud, database
+    from app.cache import TTLCache
+
+    monkeypatch.chdir(tmp_path)  # DB_PATH is relative to the working directory
+    # Every thread (executor workers included) opens a new connection to the fresh file
+    monkeypatch.setattr(database, "_local", threading.local())
+    for value in vars(crud).values():
+        if isinstance(value, TTLCache):
+            value.clear()
+    crud._pending_logs.clear()
+    database.init_db()
+    yield
+    database.get_db_connection().close()
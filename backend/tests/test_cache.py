@@ -0,0 +1,55 @@
+from app.cache import TTLCache, ttl_cached
+
+
+def test_results_are_cached_per_normalized_arguments():
+    cache = TTLCache()
+    calls = []
+
+    @ttl_cached(cache)
+    def lookup(a, b=None, c=None):
+        calls.append((a, b, c))
+        return len(calls)
+
+    assert lookup(1, b=2, c=3) == lookup(1, c=3, b=2) == 1
+    assert lookup(2) == 2
+    cache.clear()
+    assert lookup(1, b=2, c=3) == 3
+
+
+def test_expired_entries_are_recomputed(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: clock[0])
+    cache = TTLCache(ttl=5.0)
+    cache.set("key", "old")
+    clock[0] += 4.9
+    assert cache.get("key") == "old"
+    clock[0] += 0.1
+    assert cache.get("key") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_result_computed_across_a_clear_is_not_cached():
+    cache = TTLCache()
+    rows = ["before"]
+
+    @ttl_cached(cache)
+    def read():
+        snapshot = list(rows)
+        # A writer commits and clears the cache while this read is still running
+        rows.append("written")
+        cache.clear()
+        return snapshot
+
+    assert read() == ["before"]
+    assert cache.get(((), ())) is None
+    assert read() == ["before", "written"]
+
+
+def test_set_with_stale_generation_is_dropped():
+    cache = TTLCache()
+    generation = cache.generation
+    cache.clear()
+    cache.set("key", "stale", generation)
+    assert cache.get("key") is None
+    cache.set("key", "fresh", cache.generation)
+    assert cache.get("key") == "fresh"
@@ -0,0 +1,69 @@
+import asyncio
+from io import BytesIO
+
+import orjson
+from fastapi import UploadFile
+
+from app.api import import_export
+from app.database import get_db_connection
+
+ITEMS_CSV = b"""itemId,name,width,depth,height,usageLimit,priority
+a,Alpha,1,2,3,5,
+b,Bravo,wide,2,3,5,1
+a,Again,1,2,3,5,1
+c,Charlie,1,1,1,,1
+"""
+
+
+def _upload(content: bytes, filename: str) -> UploadFile:
+    return UploadFile(BytesIO(content), size=len(content), filename=filename)
+
+
+def test_csv_import_reports_invalid_and_duplicate_rows(db):
+    result = asyncio.run(import_export.import_items(_upload(ITEMS_CSV, "items.csv")))
+    assert result["itemsImported"] == 1
+    assert [(error["row"], error["message"].split(":")[0]) for error in result["errors"]] == [
+        (3, "width"), (4, "Duplicate itemId in file"), (5, "usageLimit")
+    ]
+    # Rows already stored are reported at their own row number
+    again = asyncio.run(import_export.import_items(_upload(ITEMS_CSV.splitlines(True)[0] + b"a,Alpha,1,2,3,5,\n", "items.csv")))
+    assert again["itemsImported"] == 0
+    assert again["errors"] == [{"row": 2, "message": "Duplicate itemId"}]
+
+
+def test_ndjson_import_reports_bad_lines(db):
+    lines = [
+        b'{"type": "container", "containerId": "C", "zone": "Z", "width": 5, "depth": 5, "height": 5}',
+        b'{"type": "item", "itemId": "a", "name": "A", "width": 1, "depth": 1, "height": 1, "usageLimit": 2}',
+        b'not json',
+        b'',
+        b'{"itemId": "b"}',
+        b'{"type": "item", "itemId": "c", "name": "C", "width": 1, "depth": 1, "height": 1}',
+        b'{"type": "item", "itemId": "a", "name": "A", "width": 1, "depth": 1, "height": 1, "usageLimit": 2}',
+        b'{"type": "item", "itemId": "d", "name": "D", "width": 1, "depth": 1, "height": 1, "usageLimit": 2, "priority": null}',
+    ]
+    upload = _upload(b"\n".join(lines) + b"\n", "data.ndjson")
+    imported, errors = import_export._import_ndjson(upload, batch_size=2)
+    assert imported == {"container": 1, "item": 2}
+    assert [(error["row"], error["message"].split(":")[0]) for error in errors] == [
+        (3, "Invalid JSON"), (5, 'Expected an object with "type"'), (6, "usageLimit"), (7, "Duplicate itemId in file")
+    ]
+
+
+def test_export_round_trips_through_ndjson_import(db):
+    containers = b"containerId,zone,width,depth,height\nC1,Crew,10,10,10\nC2,Lab,5,5,5\n"
+    items = b"itemId,name,width,depth,height,usageLimit,priority,containerId,endW,endD,endH\n" + b"".join(
+        f"i{n},Item {n},1,1,1,{n},{n % 3},C{n % 2 + 1},1,1,1\n".encode() for n in range(5)
+    )
+    asyncio.run(import_export.import_containers(_upload(containers, "containers.csv")))
+    asyncio.run(import_export.import_items(_upload(items, "items.csv")))
+    exported = b"".join(import_export._export_ndjson_chunks(batch_size=2))
+    assert [orjson.loads(line)["type"] for line in exported.splitlines()] == ["container"] * 2 + ["item"] * 5
+
+    conn = get_db_connection()
+    with conn:
+        conn.execute("DELETE FROM items")
+        conn.execute("DELETE FROM containers")
+    result = asyncio.run(import_export.import_data(_upload(exported, "data.ndjson")))
+    assert (result["containersImported"], result["itemsImported"], result["errors"]) == (2, 5, [])
+    assert b"".join(import_export._export_ndjson_chunks()) == exported
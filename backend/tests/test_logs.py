@@ -0,0 +1,93 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import crud, main
+from app.api.schemas import Log
+from app.database import get_db_connection
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _log(n, item_id="a"):
+    return Log(timestamp=START + timedelta(minutes=n), userId="u", actionType="retrieval",
+               details={"n": n}, itemId=item_id)
+
+
+def _stored_count():
+    return get_db_connection().execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+
+
+def test_create_log_flushes_once_the_buffer_is_full(db, monkeypatch):
+    monkeypatch.setattr(crud, "LOG_FLUSH_THRESHOLD", 3)
+    assert crud.queue_log(_log(0)) is False
+    crud.create_log(_log(1))
+    assert (_stored_count(), crud.has_pending_logs()) == (0, True)
+    crud.create_log(_log(2))
+    assert (_stored_count(), crud.has_pending_logs()) == (3, False)
+
+
+def test_get_logs_includes_queued_entries(db):
+    crud.queue_log(_log(0))
+    crud.queue_log(_log(1, item_id="b"))
+    assert [row["itemId"] for row in crud.get_logs()] == ["a", "b"]
+    assert [row["itemId"] for row in crud.get_logs(startDate=START + timedelta(seconds=30))] == ["b"]
+    assert not crud.has_pending_logs()
+
+
+def test_failed_flush_requeues_its_batch_in_order(db):
+    conn = get_db_connection()
+    crud.queue_log(_log(0))
+    conn.execute("ALTER TABLE logs RENAME TO logs_unavailable")
+    with pytest.raises(sqlite3.Error):
+        crud.flush_logs()
+    crud.queue_log(_log(1))
+    conn.execute("ALTER TABLE logs_unavailable RENAME TO logs")
+    assert crud.flush_logs() == 2
+    assert [row["details"] for row in crud.get_logs()] == ['{"n":0}', '{"n":1}']
+
+
+def test_lifespan_flushes_periodically_and_on_shutdown(db):
+    async def run():
+        async with main.lifespan(main.app):
+            crud.queue_log(_log(0))
+            for _ in range(100):
+                await asyncio.sleep(crud.LOG_FLUSH_INTERVAL)
+                if not crud.has_pending_logs():
+                    break
+            periodic = _stored_count()
+            crud.queue_log(_log(1))  # Left for the shutdown flush
+        return periodic
+
+    assert asyncio.run(run()) == 1
+    assert _stored_count() == 2
+
+
+def test_periodic_flush_survives_a_failed_flush(db, monkeypatch, caplog):
+    calls = []
+
+    def flaky_flush():
+        calls.append(None)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return crud.flush_logs()
+
+    monkeypatch.setattr(main, "flush_logs", flaky_flush)
+
+    async def run():
+        task = asyncio.create_task(main._flush_logs_periodically())
+        await asyncio.sleep(crud.LOG_FLUSH_INTERVAL * 3)
+        assert calls == []  # Nothing queued, so no flush is dispatched
+        crud.queue_log(_log(0))
+        for _ in range(100):
+            await asyncio.sleep(crud.LOG_FLUSH_INTERVAL)
+            if len(calls) >= 2:
+                break
+        task.cancel()
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert _stored_count() == 1
+    assert "Periodic log flush failed" in caplog.text
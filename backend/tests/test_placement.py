@@ -0,0 +1,48 @@
+import asyncio
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+from app.api.placement import placement
+from app.api.schemas import PlacementRequest
+from app.crud import get_container_coords, get_existing_item_ids
+
+CONTAINER = {"containerId": "C", "zone": "Z", "width": 10, "depth": 10, "height": 10}
+
+
+def _request(*item_ids):
+    return PlacementRequest(
+        items=[{"itemId": item_id, "name": item_id, "width": 1, "depth": 1, "height": 1, "usageLimit": 1}
+               for item_id in item_ids],
+        containers=[CONTAINER],
+    )
+
+
+def test_placement_rejects_itemid_repeated_in_request(db):
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(placement(_request("a", "b", "a")))
+    assert excinfo.value.status_code == 400
+    assert "a" in excinfo.value.detail
+    assert get_existing_item_ids(["a", "b"]) == set()
+
+
+def test_placement_rejects_itemid_already_stored(db):
+    first = orjson.loads(asyncio.run(placement(_request("a", "b"))).body)
+    assert sorted(p["itemId"] for p in first["placements"]) == ["a", "b"]
+    assert first["errors"] == []
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(placement(_request("c", "b")))
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "Items already stored: b"
+    assert get_existing_item_ids(["a", "b", "c"]) == {"a", "b"}
+
+
+def test_container_coords_are_reread_after_an_insert(db):
+    assert get_container_coords(["C"])["C"].shape == (0, 6)  # Now cached as empty
+    asyncio.run(placement(_request("a", "b")))
+    assert get_container_coords(["C"])["C"].shape == (2, 6)
+    asyncio.run(placement(_request("c")))
+    assert get_container_coords(["C"])["C"].shape == (3, 6)
+    assert not get_container_coords(["C"])["C"].flags.writeable
@@ -0,0 +1,71 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.api.utils._placement_kernels import ZONE_PENALTY, blocking_pairs, overlap_matrix, search_rotations
+from app.api.utils.placement_algorithm import check_collision, score_placement
+
+
+def _random_boxes(rng, n, grid=6, max_size=3):
+    """(N, 6) boxes on an integer grid (many exact face contacts), sorted by z0 like AABBIndex."""
+    starts = np.array([[rng.randint(0, grid) for _ in range(3)] for _ in range(n)], dtype=np.float64)
+    sizes = np.array([[rng.randint(1, max_size) for _ in range(3)] for _ in range(n)], dtype=np.float64)
+    boxes = np.hstack([starts, starts + sizes])
+    return boxes[np.argsort(boxes[:, 2], kind='stable')]
+
+
+def _placed(box):
+    x0, y0, z0, x1, y1, z1 = box
+    return SimpleNamespace(pos_x=x0, pos_y=y0, pos_z=z0, width=x1 - x0, height=y1 - y0, depth=z1 - z0)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_blocking_pairs_matches_scalar_loop(seed):
+    boxes = _random_boxes(random.Random(seed), 60)
+    expected = [
+        (i, j)
+        for i, (ax0, ay0, _, ax1, ay1, az1) in enumerate(boxes.tolist())
+        for j, (bx0, by0, bz0, bx1, by1, _) in enumerate(boxes.tolist())
+        if i != j and bz0 >= az1 and max(ax0, bx0) < min(ax1, bx1) and max(ay0, by0) < min(ay1, by1)
+    ]
+    rows, cols = blocking_pairs(boxes, block_size=16)
+    assert list(zip(rows.tolist(), cols.tolist())) == expected
+
+
+def test_overlap_matrix_matches_check_collision():
+    rng = random.Random(7)
+    a, b = _random_boxes(rng, 40), _random_boxes(rng, 30)
+    matrix = overlap_matrix(a[:, :3], a[:, 3:], b[:, :3], b[:, 3:])
+    for i, (x0, y0, z0, x1, y1, z1) in enumerate(a.tolist()):
+        for j, box in enumerate(b):
+            assert matrix[i, j] == check_collision(x0, y0, z0, x1 - x0, y1 - y0, z1 - z0, _placed(box))
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("preferred", [True, False])
+def test_search_rotations_matches_brute_force(seed, preferred):
+    rng = random.Random(seed)
+    container = SimpleNamespace(width=8.0, height=8.0, depth=8.0, zone="A")
+    item = SimpleNamespace(preferredZone="A" if preferred else "B")
+    placed = _random_boxes(rng, 12)
+    points = np.array([[rng.randint(0, 8) for _ in range(3)] for _ in range(80)], dtype=np.float64)
+    rotation_dims = [(1.0, 2.0, 3.0), (3.0, 1.0, 2.0), (2.0, 3.0, 1.0)]
+
+    best = (float('inf'), -1, -1)
+    for r, (w, h, d) in enumerate(rotation_dims):
+        for p, (x, y, z) in enumerate(points.tolist()):
+            if not (x + w <= container.width and y + h <= container.height and z + d <= container.depth):
+                continue
+            if any(check_collision(x, y, z, w, h, d, _placed(box)) for box in placed):
+                continue
+            score = score_placement(container, item, x, y, z, d)
+            if score < best[0]:
+                best = (score, r, p)
+
+    result = search_rotations(
+        points, rotation_dims, (container.width, container.height, container.depth),
+        placed[:, :3], placed[:, 3:], 0.0 if preferred else ZONE_PENALTY
+    )
+    assert result == best
@@ -0,0 +1,49 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.utils.retrieval_algorithm import (
+    build_aabb_index, build_blocking_graph, calculate_retrieval_steps, get_items_to_move
+)
+
+
+def _items(seed, n=120):
+    rng = random.Random(seed)
+    return [SimpleNamespace(id=i, container_id=1, pos_x=rng.randint(0, 6), pos_y=rng.randint(0, 6),
+                            pos_z=rng.randint(0, 6), width=rng.randint(1, 3), height=rng.randint(1, 3),
+                            depth=rng.randint(1, 3))
+            for i in range(n)]
+
+
+def _scalar_blockers(target, items):
+    return {
+        other.id for other in items
+        if other.id != target.id and other.pos_z >= target.pos_z + target.depth
+        and max(target.pos_x, other.pos_x) < min(target.pos_x + target.width, other.pos_x + other.width)
+        and max(target.pos_y, other.pos_y) < min(target.pos_y + target.height, other.pos_y + other.height)
+    }
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_blocking_graph_and_index_match_scalar_geometry(seed):
+    items = _items(seed)
+    graph = build_blocking_graph(items)
+    index = build_aabb_index(items)
+    for item in items:
+        expected = _scalar_blockers(item, items)
+        assert graph[item.id] == expected
+        assert index.blockers_of(item.id) == expected
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_retrieval_steps_same_with_and_without_graph(seed):
+    items = _items(seed)
+    by_id, by_container = {item.id: item for item in items}, {"1": items}
+    graph = build_blocking_graph(items)
+    for item in items:
+        with_graph = get_items_to_move(item.id, by_id, by_container, graph)
+        # Breadth-first order within one level follows set iteration, so compare membership
+        assert set(with_graph) == set(get_items_to_move(item.id, by_id, by_container))
+        assert len(set(with_graph)) == len(with_graph)
+        assert calculate_retrieval_steps(item.id, by_id, by_container, graph) == len(with_graph)
@@ -0,0 +1,15 @@
+from app.api import schemas
+
+
+def test_transport_models_are_exported():
+    for name in ("Item", "Container", "Log", "PlacementRequest"):
+        assert isinstance(getattr(schemas, name), type), name
+
+
+def test_placement_request_parses_items_and_containers():
+    request = schemas.PlacementRequest(
+        items=[{"itemId": "a", "name": "A", "width": 1, "depth": 2, "height": 3, "usageLimit": 1, "weight": 4}],
+        containers=[{"containerId": "C", "zone": "Z", "width": 10, "depth": 10, "height": 10}],
+    )
+    assert request.items[0].mass == 4
+    assert request.containers[0].containerId == "C"
@@ -0,0 +1,114 @@
+import base64
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app import schemas
+from app.api.utils.search import (
+    calculate_search_score, encode_blocking_mask, pack_search_response, search_items, search_scores
+)
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _placed(item_id, x, y, z, definition_id=1, container_id=1):
+    return SimpleNamespace(id=item_id, item_definition_id=definition_id, container_id=container_id,
+                           pos_x=x, pos_y=y, pos_z=z, width=1.0, height=1.0, depth=1.0)
+
+
+def _mask_members(mask: bytes, item_index):
+    return [item_index[i] for i in range(len(item_index)) if mask[i >> 3] & (1 << (i & 7))]
+
+
+def test_encode_blocking_mask_is_little_endian():
+    index_of = {str(i): i for i in range(11)}
+    mask = encode_blocking_mask(["0", "9", "10"], index_of, 11)
+    assert mask == b"\x01\x06"
+    assert encode_blocking_mask([], {}, 0) == b""
+
+
+def test_search_result_item_round_trips_through_json():
+    item = schemas.SearchResultItem(
+        item={"startW": 0, "startD": 0, "startH": 0, "width": 1, "depth": 1, "height": 1,
+              "endW": 1, "endD": 1, "endH": 1, "itemId": "a", "name": "A", "containerId": "C", "priority": 1},
+        retrieval_steps=1,
+        blocking_mask=b"\xff\xfe\x03",
+        retrieval_instructions=[{"move": "b", "from": "C"}],
+    )
+    response = schemas.SearchResponse(item_index=["b"], results=[item])
+    payload = response.model_dump_json(by_alias=True)
+    assert '"from":"C"' in payload
+    assert base64.b64encode(b"\xff\xfe\x03").decode() in payload
+    assert schemas.SearchResponse.model_validate_json(payload) == response
+
+
+def test_search_results_carry_blocking_mask_over_shared_index():
+    # Column of three boxes along Z: everything in front of a box on its footprint blocks it
+    items = [_placed(1, 0, 0, 0), _placed(2, 0, 0, 1), _placed(3, 0, 0, 2), _placed(4, 5, 5, 0)]
+    definitions = {1: SimpleNamespace(name="box", priority=1, expiryDate=None)}
+    results = search_items(items, definitions, {"1": items}, {item.id: item for item in items},
+                           now=datetime(2026, 1, 1, tzinfo=timezone.utc))
+    packed = pack_search_response(results)
+    assert packed["item_index"] == ["2", "3"]
+    blockers = {
+        entry["placed_item_id"]: _mask_members(base64.b64decode(entry["blocking_mask"]), packed["item_index"])
+        for entry in packed["results"]
+    }
+    assert blockers == {1: ["2", "3"], 2: ["3"], 3: [], 4: []}
+    assert {entry["placed_item_id"]: entry["retrieval_steps"] for entry in packed["results"]} == {1: 2, 2: 1, 3: 0, 4: 0}
+
+
+def _random_search_space(seed, n_items=400, n_definitions=40):
+    rng = random.Random(seed)
+    definitions = {
+        d: SimpleNamespace(
+            name=f"item {d}", priority=rng.randint(1, 10),
+            # Whole days give equal scores (exercising tie order); some items never expire
+            expiryDate=NOW + timedelta(days=rng.randint(-3, 12)) if rng.random() < 0.6 else None
+        )
+        for d in range(n_definitions)
+    }
+    items = [_placed(i, rng.randint(0, 4), rng.randint(0, 4), rng.randint(0, 4),
+                     definition_id=rng.randrange(n_definitions), container_id=rng.randrange(3))
+             for i in range(n_items)]
+    by_container = {}
+    for item in items:
+        by_container.setdefault(str(item.container_id), []).append(item)
+    return items, definitions, by_container, {item.id: item for item in items}
+
+
+def test_search_scores_match_scalar_bit_for_bit():
+    rng = random.Random(3)
+    steps = [rng.randint(0, 20) for _ in range(500)]
+    priorities = [rng.randint(1, 10) for _ in range(500)]
+    expiries = [None if rng.random() < 0.3 else NOW.timestamp() + rng.uniform(-10, 20) * 86400 for _ in range(500)]
+    vectorized = search_scores(
+        np.array(steps, dtype=np.float64), np.array(priorities, dtype=np.float64),
+        np.array([np.nan if e is None else e for e in expiries]), NOW.timestamp()
+    ).tolist()
+    for k in range(500):
+        definition = SimpleNamespace(priority=priorities[k], expiryDate=None)
+        scalar = calculate_search_score(None, definition, steps[k], NOW.timestamp(), expiries[k])
+        assert vectorized[k] == scalar
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("limit", [1, 7, 50])
+def test_bounded_search_returns_prefix_of_full_ranking(seed, limit):
+    space = _random_search_space(seed)
+    full = search_items(*space, now=NOW)
+    bounded = search_items(*space, now=NOW, limit=limit)
+    key = lambda result: (result["placed_item_id"], result["search_score"], result["retrieval_steps"])
+    assert [key(r) for r in bounded] == [key(r) for r in full[:limit]]
+    scores = [r["search_score"] for r in full]
+    assert scores == sorted(scores)
+
+
+def test_unsorted_search_with_limit_keeps_filter_order():
+    space = _random_search_space(5)
+    unsorted = search_items(*space, now=NOW, sort_by_score=False)
+    assert [r["placed_item_id"] for r in search_items(*space, now=NOW, sort_by_score=False, limit=10)] == \
+        [r["placed_item_id"] for r in unsorted[:10]]